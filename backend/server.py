@@ -1,31 +1,286 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Header
+from fastapi import FastAPI, APIRouter, HTTPException, Header, Query, BackgroundTasks, WebSocket, WebSocketDisconnect, Depends, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse, Response, ORJSONResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
-from motor.motor_asyncio import AsyncIOMotorClient
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorGridFSBucket
+from pymongo import UpdateOne, ReplaceOne, IndexModel, ASCENDING, DESCENDING, GEOSPHERE, ReturnDocument, monitoring
+from pymongo.errors import OperationFailure, BulkWriteError
 import os
 import logging
 from pathlib import Path
-from pydantic import BaseModel, Field, ConfigDict, EmailStr
-from typing import List, Optional, Literal
+from types import SimpleNamespace
+from collections import deque, OrderedDict, defaultdict
+from contextvars import ContextVar
+from pydantic import BaseModel, Field, ConfigDict, EmailStr, computed_field, ValidationError
+from typing import List, Optional, Literal, Generic, TypeVar, Union
 import uuid
 from datetime import datetime, timezone, timedelta
 import jwt
 import re
+import json
+import base64
+import binascii
+import hashlib
+import time
+import asyncio
+import tempfile
+import io
+import multiprocessing
+import csv
+import gzip
+import itertools
+import bisect
+import math
+import threading
+import functools
+import orjson
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
+# ============ METRICS ============
+# Per-route request counts, latency and response-size histograms, Mongo time
+# and documents fetched vs returned, rendered in Prometheus text format on
+# /metrics. Motor runs pymongo in executor threads with a copy of the caller's
+# context, so the command listener attributes each command to the request that
+# issued it through a ContextVar; commands outside a request are labelled
+# route="background".
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+# Log requests slower than this many milliseconds with the Mongo commands they issued; 0 disables
+SLOW_REQUEST_MS = float(os.environ.get('SLOW_REQUEST_MS', 0))
+MAX_SLOW_LOG_COMMANDS = 50
+BACKGROUND_ROUTE = 'background'
+
+class RequestStats:
+    def __init__(self):
+        self.db = defaultdict(lambda: [0.0, 0])  # command name -> [seconds, calls]
+        self.db_seconds = 0.0
+        self.docs_fetched = 0
+        self.docs_returned = 0
+        self.commands = [] if SLOW_REQUEST_MS else None
+
+_request_stats: ContextVar[Optional[RequestStats]] = ContextVar('request_stats', default=None)
+
+def note_documents_returned(count: int):
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.docs_returned += count
+
+class Histogram:
+    def __init__(self, buckets: tuple):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def render(self, name: str, labels: str) -> List[str]:
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + ('+Inf',), self.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+        lines.append(f'{name}_sum{{{labels}}} {self.sum:.6f}')
+        lines.append(f'{name}_count{{{labels}}} {self.count}')
+        return lines
+
+class Metrics:
+    def __init__(self):
+        # Command listener callbacks arrive on executor threads
+        self.lock = threading.Lock()
+        self.requests = defaultdict(int)  # (method, route, status) -> count
+        self.latency = defaultdict(lambda: Histogram(LATENCY_BUCKETS))
+        self.size = defaultdict(lambda: Histogram(SIZE_BUCKETS))
+        self.db_seconds = defaultdict(float)  # (route, command) -> seconds
+        self.db_calls = defaultdict(int)
+        self.docs_fetched = defaultdict(int)  # route -> documents
+        self.docs_returned = defaultdict(int)
+
+    def record_command(self, route: str, command: str, seconds: float, calls: int = 1):
+        with self.lock:
+            self.db_seconds[(route, command)] += seconds
+            self.db_calls[(route, command)] += calls
+
+    def record_request(self, method: str, route: str, status: int, seconds: float, size: int, stats: RequestStats):
+        with self.lock:
+            self.requests[(method, route, status)] += 1
+            self.latency[route].observe(seconds)
+            self.size[route].observe(size)
+            self.docs_fetched[route] += stats.docs_fetched
+            self.docs_returned[route] += stats.docs_returned
+        for command, (command_seconds, calls) in stats.db.items():
+            self.record_command(route, command, command_seconds, calls)
+
+    def render(self) -> str:
+        with self.lock:
+            lines = ['# TYPE http_requests_total counter']
+            for (method, route, status), count in sorted(self.requests.items()):
+                lines.append(f'http_requests_total{{method="{method}",route="{route}",status="{status}"}} {count}')
+            lines.append('# TYPE http_request_duration_seconds histogram')
+            for route, histogram in sorted(self.latency.items()):
+                lines.extend(histogram.render('http_request_duration_seconds', f'route="{route}"'))
+            lines.append('# TYPE http_response_size_bytes histogram')
+            for route, histogram in sorted(self.size.items()):
+                lines.extend(histogram.render('http_response_size_bytes', f'route="{route}"'))
+            lines.append('# TYPE mongo_command_seconds_total counter')
+            for (route, command), seconds in sorted(self.db_seconds.items()):
+                lines.append(f'mongo_command_seconds_total{{route="{route}",command="{command}"}} {seconds:.6f}')
+            lines.append('# TYPE mongo_commands_total counter')
+            for (route, command), calls in sorted(self.db_calls.items()):
+                lines.append(f'mongo_commands_total{{route="{route}",command="{command}"}} {calls}')
+            lines.append('# TYPE mongo_documents_fetched_total counter')
+            for route, count in sorted(self.docs_fetched.items()):
+                lines.append(f'mongo_documents_fetched_total{{route="{route}"}} {count}')
+            lines.append('# TYPE api_documents_returned_total counter')
+            for route, count in sorted(self.docs_returned.items()):
+                lines.append(f'api_documents_returned_total{{route="{route}"}} {count}')
+        return '\n'.join(lines) + '\n'
+
+metrics = Metrics()
+
+def _reply_documents(reply: Optional[dict]) -> int:
+    if not reply:
+        return 0
+    batch = reply.get('cursor', {})
+    if batch:
+        return len(batch.get('firstBatch', batch.get('nextBatch', ())))
+    return 1 if reply.get('value') else 0  # findAndModify
+
+class CommandMetrics(monitoring.CommandListener):
+    def __init__(self):
+        self.pending = {}  # (connection, request id) -> command summary for the slow log
+
+    def started(self, event):
+        stats = _request_stats.get()
+        if stats is None or stats.commands is None:
+            return
+        target = event.command.get(event.command_name)
+        summary = {'command': event.command_name, 'collection': target if isinstance(target, str) else event.command.get('collection')}
+        for key in ('filter', 'pipeline', 'query', 'sort', 'limit'):
+            if key in event.command:
+                summary[key] = str(event.command[key])[:300]
+        self.pending[(event.connection_id, event.request_id)] = summary
+
+    def succeeded(self, event):
+        self._finish(event, event.reply)
+
+    def failed(self, event):
+        self._finish(event, None)
+
+    def _finish(self, event, reply):
+        seconds = event.duration_micros / 1e6
+        stats = _request_stats.get()
+        if stats is None:
+            metrics.record_command(BACKGROUND_ROUTE, event.command_name, seconds)
+            return
+        docs = _reply_documents(reply)
+        entry = stats.db[event.command_name]
+        entry[0] += seconds
+        entry[1] += 1
+        stats.db_seconds += seconds
+        stats.docs_fetched += docs
+        summary = self.pending.pop((event.connection_id, event.request_id), None)
+        if summary is not None and len(stats.commands) < MAX_SLOW_LOG_COMMANDS:
+            summary.update(ms=round(seconds * 1000, 2), docs=docs, ok=reply is not None)
+            stats.commands.append(summary)
+
+class MetricsMiddleware:
+    """Plain ASGI middleware so streamed bodies are counted as they are sent."""
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+        stats = RequestStats()
+        token = _request_stats.set(stats)
+        start = time.perf_counter()
+        status = 500
+        size = 0
+        finished = None
+        
+        async def send_with_metrics(message):
+            nonlocal status, size, finished
+            if message['type'] == 'http.response.start':
+                status = message['status']
+            elif message['type'] == 'http.response.body':
+                size += len(message.get('body', b''))
+                if not message.get('more_body'):
+                    # Background tasks run after this; they are not part of the latency
+                    finished = time.perf_counter()
+            await send(message)
+        
+        try:
+            await self.app(scope, receive, send_with_metrics)
+        finally:
+            _request_stats.reset(token)
+            seconds = (finished or time.perf_counter()) - start
+            route = scope.get('route')
+            # Unmatched paths share one label to keep cardinality bounded
+            route_path = route.path if route is not None else 'unmatched'
+            metrics.record_request(scope['method'], route_path, status, seconds, size, stats)
+            if SLOW_REQUEST_MS and seconds * 1000 >= SLOW_REQUEST_MS:
+                logging.getLogger(__name__).warning(
+                    f"Slow request {scope['method']} {route_path} {status} {seconds * 1000:.1f}ms "
+                    f"db={stats.db_seconds * 1000:.1f}ms fetched={stats.docs_fetched} returned={stats.docs_returned} "
+                    f"commands={json.dumps(stats.commands)}"
+                )
+
 # MongoDB connection
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
+# Timestamps are stored as BSON dates; tz_aware returns them as UTC-aware datetimes
+client = AsyncIOMotorClient(mongo_url, tz_aware=True, event_listeners=[CommandMetrics()])
 db = client[os.environ['DB_NAME']]
 
 # JWT Configuration
 JWT_SECRET = os.environ.get('JWT_SECRET', 'campus_catalyst_secret_key_change_in_production')
 JWT_ALGORITHM = 'HS256'
+# Key rotation: JWT_KEYS="kid1:secret1,kid2:secret2". The first key signs new
+# tokens; the rest still verify. Tokens without a kid verify with JWT_SECRET,
+# and so do tokens signed as 'default' before JWT_KEYS was set, until they expire.
+JWT_KEYS = dict(
+    (kid.strip(), secret.strip())
+    for kid, _, secret in (pair.partition(':') for pair in os.environ.get('JWT_KEYS', '').split(','))
+    if kid.strip() and secret.strip()
+) or {'default': JWT_SECRET}
+JWT_ACTIVE_KID = next(iter(JWT_KEYS))
+JWT_KEYS.setdefault('default', JWT_SECRET)
+TOKEN_CACHE_SIZE = int(os.environ.get('TOKEN_CACHE_SIZE', 10000))
+
+# Image store configuration ('filesystem' or 'gridfs')
+IMAGE_STORE_BACKEND = os.environ.get('IMAGE_STORE_BACKEND', 'filesystem')
+IMAGE_STORE_DIR = Path(os.environ.get('IMAGE_STORE_DIR', ROOT_DIR / 'image_store'))
+
+# Archival of resolved complaints and lost & found items: 'collection' moves them
+# into <name>_archive collections, 'segments' into gzipped NDJSON files under
+# ARCHIVE_DIR. ARCHIVE_AFTER_DAYS=0 leaves archiving to the CLI.
+ARCHIVE_BACKEND = os.environ.get('ARCHIVE_BACKEND', 'collection')
+ARCHIVE_DIR = Path(os.environ.get('ARCHIVE_DIR', ROOT_DIR / 'archive'))
+ARCHIVE_AFTER_DAYS = int(os.environ.get('ARCHIVE_AFTER_DAYS', 0))
+MAX_IMAGE_BYTES = int(os.environ.get('MAX_IMAGE_BYTES', 10 * 1024 * 1024))
+THUMBNAIL_WORKERS = int(os.environ.get('THUMBNAIL_WORKERS', 2))
+
+# Sports equipment loans and reservations
+ISSUE_PERIOD = timedelta(hours=float(os.environ.get('ISSUE_PERIOD_HOURS', 2)))
+SCHEDULER_INTERVAL_SECONDS = float(os.environ.get('SCHEDULER_INTERVAL_SECONDS', 60))
+
+# Optional write-behind batching for mess feedback
+FEEDBACK_WRITE_BEHIND = os.environ.get('FEEDBACK_WRITE_BEHIND', 'false').lower() in ('1', 'true', 'yes')
+FEEDBACK_QUEUE_SIZE = int(os.environ.get('FEEDBACK_QUEUE_SIZE', 10000))
+FEEDBACK_BATCH_SIZE = int(os.environ.get('FEEDBACK_BATCH_SIZE', 500))
+FEEDBACK_FLUSH_SECONDS = float(os.environ.get('FEEDBACK_FLUSH_SECONDS', 0.5))
 
 # Create the main app without a prefix
-app = FastAPI()
+app = FastAPI(default_response_class=ORJSONResponse)
 
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
@@ -53,6 +308,9 @@ class MessMenu(BaseModel):
     snacks: List[str]
     dinner: List[str]
 
+class MessMenuImport(BaseModel):
+    menus: List[MessMenu]
+
 class MessFeedback(BaseModel):
     model_config = ConfigDict(extra="ignore")
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
@@ -75,83 +333,2601 @@ class SportsEquipment(BaseModel):
     status: Literal['Available', 'Issued', 'Under Maintenance']
     issued_to: Optional[str] = None
     issued_at: Optional[datetime] = None
+    due_at: Optional[datetime] = None
+    updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
+class BookEquipmentRequest(BaseModel):
+    equipment_id: str
+
+SLOT_MINUTES = 30
+MAX_SLOTS_PER_RESERVATION = 4
+RESERVATION_HORIZON = timedelta(days=7)
+SLOT_RETENTION = timedelta(days=1)
+
+class WaitlistEntry(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    equipment_id: str
+    email: str
+    status: Literal['waiting', 'assigned', 'cancelled'] = 'waiting'
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
+class SlotReservationRequest(BaseModel):
+    slot_start: datetime
+    slots: int = Field(1, ge=1, le=MAX_SLOTS_PER_RESERVATION)
+
+class UpdateEquipmentStatusRequest(BaseModel):
+    status: Literal['Available', 'Issued', 'Under Maintenance']
+    issued_to: Optional[str] = None
+
+# ============ LOST & FOUND MODELS ============
+class LostFoundItem(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    type: Literal['lost', 'found']
+    item_name: str
+    description: str
+    location: str
+    contact_email: str
+    contact_name: str
+    image_hash: Optional[str] = None
+    thumbnail_hash: Optional[str] = None
+    imageBase64: Optional[str] = None  # legacy inline image, cleared by migrate-images
+    mimeType: Optional[str] = None
+    date: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    status: Literal['active', 'resolved'] = 'active'
+    resolved_at: Optional[datetime] = None
+    location_id: Optional[str] = None
+    building: Optional[str] = None
+    floor: Optional[int] = None
+    updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
+    @computed_field
+    @property
+    def image_url(self) -> Optional[str]:
+        return image_url_for(self.image_hash)
+
+    @computed_field
+    @property
+    def thumbnail_url(self) -> Optional[str]:
+        return image_url_for(self.thumbnail_hash)
+
+class LostFoundCreate(BaseModel):
+    type: Literal['lost', 'found']
+    item_name: str
+    description: str
+    location: str
+    contact_name: str
+    imageBase64: Optional[str] = None
+    mimeType: Optional[str] = None
+
+class LostFoundStatusUpdate(BaseModel):
+    status: Literal['active', 'resolved']
+
+class NearbyLostFoundItem(LostFoundItem):
+    distance_m: float
+
+class LostFoundMatch(BaseModel):
+    item: LostFoundItem
+    score: float
+    signals: dict
+
+# ============ COMPLAINT MODELS ============
+class Complaint(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    title: str
+    description: str
+    location: str
+    category: Literal['waste', 'maintenance', 'other']
+    contact_email: str
+    image_hash: Optional[str] = None
+    thumbnail_hash: Optional[str] = None
+    imageBase64: Optional[str] = None  # legacy inline image, cleared by migrate-images
+    mimeType: Optional[str] = None
+    status: Literal['Pending', 'In Progress', 'Resolved'] = 'Pending'
+    priority: Literal['low', 'normal', 'high', 'urgent'] = 'normal'
+    assigned_to: Optional[str] = None
+    sla_due_at: Optional[datetime] = None
+    escalation_level: int = 0
+    resolved_at: Optional[datetime] = None
+    location_id: Optional[str] = None
+    building: Optional[str] = None
+    floor: Optional[int] = None
+    duplicate_of: Optional[str] = None
+    duplicate_score: Optional[float] = None
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
+    @computed_field
+    @property
+    def image_url(self) -> Optional[str]:
+        return image_url_for(self.image_hash)
+
+    @computed_field
+    @property
+    def thumbnail_url(self) -> Optional[str]:
+        return image_url_for(self.thumbnail_hash)
+
+class CampusLocation(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+    id: str = Field(pattern=r'^[a-z0-9-]+$')
+    name: str
+    building: str
+    aliases: List[str] = []
+    floors: Optional[int] = None
+    coordinates: Optional[List[float]] = Field(None, min_length=2, max_length=2)  # [longitude, latitude]
+
+class ComplaintCreate(BaseModel):
+    title: str
+    description: str
+    location: str
+    category: Literal['waste', 'maintenance', 'other']
+    imageBase64: Optional[str] = None
+    mimeType: Optional[str] = None
+
+class ComplaintStatusUpdate(BaseModel):
+    status: Literal['Pending', 'In Progress', 'Resolved']
+    note: Optional[str] = None
+
+class ComplaintAssignment(BaseModel):
+    # An explicit null assigned_to unassigns; omitted fields are left alone
+    assigned_to: Optional[EmailStr] = None
+    priority: Optional[Literal['low', 'normal', 'high', 'urgent']] = None
+    note: Optional[str] = None
+
+class ComplaintEvent(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    complaint_id: str
+    at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    actor: str
+    action: Literal['created', 'status', 'assignment', 'escalated', 'duplicate']
+    changes: dict = {}
+    note: Optional[str] = None
+
+# ============ PAGINATION MODELS ============
+T = TypeVar('T')
+
+class Page(BaseModel, Generic[T]):
+    items: List[T]
+    next_cursor: Optional[str] = None
+
+# ============ HELPER FUNCTIONS ============
+def image_url_for(image_hash: Optional[str]) -> Optional[str]:
+    return f'/api/images/{image_hash}' if image_hash else None
+
+# ============ AUTH ============
+# Verified token payloads are kept in a bounded LRU keyed by the token's
+# SHA-256, so a token presented again skips the HMAC check until its exp.
+# Revoked jtis are checked on every request, including cache hits, and held
+# with their token's exp so the refresher can drop them once they expire.
+REVOCATION_REFRESH_SECONDS = 60
+
+class TokenCache:
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+
+    def get(self, key: bytes, now: float) -> Optional[dict]:
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        payload, expires_at = entry
+        if expires_at <= now:
+            del self.entries[key]
+            return None
+        self.entries.move_to_end(key)
+        return payload
+
+    def put(self, key: bytes, payload: dict, expires_at: float):
+        self.entries[key] = (payload, expires_at)
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+token_cache = TokenCache(TOKEN_CACHE_SIZE)
+revoked_token_ids = {}
+
+def issue_token(payload: dict) -> str:
+    return jwt.encode(
+        {**payload, 'jti': uuid.uuid4().hex},
+        JWT_KEYS[JWT_ACTIVE_KID],
+        algorithm=JWT_ALGORITHM,
+        headers={'kid': JWT_ACTIVE_KID}
+    )
+
+def decode_token(token: str) -> dict:
+    try:
+        kid = jwt.get_unverified_header(token).get('kid')
+        secret = JWT_KEYS.get(kid) if kid else JWT_SECRET
+        if secret is None:
+            raise HTTPException(status_code=401, detail='Invalid token')
+        return jwt.decode(token, secret, algorithms=[JWT_ALGORITHM])
+    except jwt.ExpiredSignatureError:
+        raise HTTPException(status_code=401, detail='Token expired')
+    except jwt.InvalidTokenError:
+        raise HTTPException(status_code=401, detail='Invalid token')
+
+def verify_token(authorization: Optional[str]) -> dict:
+    if not authorization or not authorization.startswith('Bearer '):
+        raise HTTPException(status_code=401, detail='Invalid authorization header')
+    
+    token = authorization.split(' ')[1]
+    key = hashlib.sha256(token.encode()).digest()
+    now = time.time()
+    payload = token_cache.get(key, now)
+    if payload is None:
+        payload = decode_token(token)
+        # Our tokens always carry exp; anything else is only trusted briefly
+        token_cache.put(key, payload, payload.get('exp', now + REVOCATION_REFRESH_SECONDS))
+    
+    if payload.get('jti') in revoked_token_ids:
+        raise HTTPException(status_code=401, detail='Token revoked')
+    return payload
+
+def verify_admin(authorization: Optional[str]) -> dict:
+    payload = verify_token(authorization)
+    if payload.get('role') != 'admin':
+        raise HTTPException(status_code=403, detail='Admin access required')
+    return payload
+
+# async so FastAPI runs them on the event loop rather than the threadpool
+async def get_current_user(authorization: Optional[str] = Header(None)) -> dict:
+    return verify_token(authorization)
+
+async def get_current_admin(authorization: Optional[str] = Header(None)) -> dict:
+    return verify_admin(authorization)
+
+async def revoke_token(payload: dict):
+    jti = payload.get('jti')
+    if not jti:
+        return
+    expires_at = datetime.fromtimestamp(payload['exp'], timezone.utc)
+    revoked_token_ids[jti] = expires_at
+    await db.revoked_tokens.update_one(
+        {'jti': jti},
+        {'$set': {'jti': jti, 'expires_at': expires_at}},
+        upsert=True
+    )
+
+async def refresh_revoked_tokens():
+    # Picks up revocations made by other workers; the TTL index prunes expired
+    # ones from the collection and the same cutoff prunes them here
+    now = datetime.now(timezone.utc)
+    cursor = db.revoked_tokens.find({'expires_at': {'$gt': now}}, {'_id': 0, 'jti': 1, 'expires_at': 1})
+    fresh = {doc['jti']: doc['expires_at'] async for doc in cursor}
+    for jti in [jti for jti, expires_at in revoked_token_ids.items() if expires_at <= now]:
+        del revoked_token_ids[jti]
+    revoked_token_ids.update(fresh)
+
+async def revocation_refresher():
+    while True:
+        try:
+            await refresh_revoked_tokens()
+        except Exception:
+            logger.exception('Refreshing revoked tokens failed')
+        await asyncio.sleep(REVOCATION_REFRESH_SECONDS)
+
+# ============ SERIALIZATION ============
+# Responses are rendered with orjson. List routes read back documents this app
+# validated when it wrote them, so they skip a second pass through Pydantic:
+# TrustedRead projects just the model's fields, fills in defaults and computed
+# fields itself, and the rows go straight to orjson. Returning a Response makes
+# FastAPI skip response_model, which then only documents the schema.
+JSON_OPTIONS = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+def dump_json(payload) -> bytes:
+    # Models and other types orjson doesn't know go through FastAPI's encoder
+    return orjson.dumps(payload, default=jsonable_encoder, option=JSON_OPTIONS)
+
+class TrustedJSONResponse(Response):
+    media_type = 'application/json'
+
+    def render(self, content) -> bytes:
+        return dump_json(content)
+
+class TrustedRead:
+    def __init__(self, model):
+        # default_factory fields (ids, timestamps) are always set when a document is written
+        self.fields = [
+            (name, None if info.is_required() or info.default_factory else info.default)
+            for name, info in model.model_fields.items()
+        ]
+        self.computed = [(name, info.wrapped_property.fget) for name, info in model.model_computed_fields.items()]
+        self.projection = {'_id': 0, **{name: 1 for name, _ in self.fields}}
+
+    def row(self, doc: dict) -> dict:
+        row = {name: doc.get(name, default) for name, default in self.fields}
+        if self.computed:
+            view = SimpleNamespace(**row)
+            for name, getter in self.computed:
+                row[name] = getter(view)
+        return row
+
+    def rows(self, docs: List[dict]) -> List[dict]:
+        return [self.row(doc) for doc in docs]
+
+@functools.lru_cache(maxsize=None)
+def trusted_read(model) -> TrustedRead:
+    return TrustedRead(model)
+
+# ============ PAGINATION ============
+# List endpoints page with keyset cursors over (sort_field, id) so each page is
+# an index range scan, never a skip. Without limit/cursor they keep returning a
+# bare list for existing clients; stream=true switches to NDJSON.
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+LEGACY_LIST_LIMIT = 1000
+STREAM_BATCH_SIZE = 100
+
+# What a cursor's sort value may decode to for each sort field; anything else is a 400
+CURSOR_SORT_TYPES = {
+    'name': (str,),
+    'date': (datetime,),
+    'created_at': (datetime,),
+    'sla_due_at': (datetime, type(None)),  # unset until the SLA backfill reaches it
+}
+
+def _cursor_value(value):
+    # Sort keys that are dates survive the JSON round trip as {"$date": iso}
+    return {'$date': value.isoformat()} if isinstance(value, datetime) else value
+
+def _cursor_hook(obj: dict):
+    if obj.keys() == {'$date'} and isinstance(obj['$date'], str):
+        return datetime.fromisoformat(obj['$date'])
+    return obj
+
+def encode_cursor(*values) -> str:
+    raw = json.dumps([_cursor_value(value) for value in values], separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+def decode_cursor(cursor: str, size: int = 2, types: Optional[tuple] = None) -> list:
+    """Decode a cursor into size values, each an instance of the matching entry in types if given."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = json.loads(raw, object_hook=_cursor_hook)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail='Invalid cursor')
+    if not isinstance(values, list) or len(values) != size:
+        raise HTTPException(status_code=400, detail='Invalid cursor')
+    if types and not all(isinstance(value, kind) for value, kind in zip(values, types)):
+        raise HTTPException(status_code=400, detail='Invalid cursor')
+    return values
+
+def keyset_filter(query: dict, sort_field: str, direction: int, cursor: Optional[str]) -> dict:
+    if not cursor:
+        return query
+    sort_value, last_id = decode_cursor(cursor, types=(CURSOR_SORT_TYPES[sort_field], str))
+    return keyset_after(query, sort_field, direction, sort_value, last_id)
+
+def keyset_after(query: dict, sort_field: str, direction: int, sort_value, last_id: str) -> dict:
+    op = '$lt' if direction < 0 else '$gt'
+    after = {'$or': [
+        {sort_field: {op: sort_value}},
+        {sort_field: sort_value, 'id': {op: last_id}}
+    ]}
+    return {'$and': [query, after]} if query else after
+
+async def _ndjson_rows(mongo_cursor, model):
+    reader = trusted_read(model)
+    async for doc in mongo_cursor:
+        note_documents_returned(1)
+        yield dump_json(reader.row(doc)) + b'\n'
+
+def _sorted_find(collection, query, sort_field, direction, cursor, projection):
+    return collection.find(
+        keyset_filter(query, sort_field, direction, cursor), projection
+    ).sort([(sort_field, direction), ('id', direction)])
+
+async def list_payload(
+    collection,
+    query: dict,
+    sort_field: str,
+    direction: int,
+    model,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None
+):
+    reader = trusted_read(model)
+    mongo_cursor = _sorted_find(collection, query, sort_field, direction, cursor, reader.projection)
+    
+    if limit is None and cursor is None:
+        rows = await mongo_cursor.to_list(LEGACY_LIST_LIMIT)
+        note_documents_returned(len(rows))
+        return reader.rows(rows)
+    
+    page_size = limit or DEFAULT_PAGE_SIZE
+    rows = await mongo_cursor.limit(page_size + 1).to_list(page_size + 1)
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        next_cursor = encode_cursor(rows[-1].get(sort_field), rows[-1]['id'])
+    note_documents_returned(len(rows))
+    
+    return {'items': reader.rows(rows), 'next_cursor': next_cursor}
+
+async def list_documents(
+    collection,
+    query: dict,
+    sort_field: str,
+    direction: int,
+    model,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    stream: bool = False
+):
+    if stream:
+        mongo_cursor = _sorted_find(collection, query, sort_field, direction, cursor, trusted_read(model).projection)
+        if limit:
+            mongo_cursor = mongo_cursor.limit(limit)
+        return StreamingResponse(
+            _ndjson_rows(mongo_cursor.batch_size(STREAM_BATCH_SIZE), model),
+            media_type='application/x-ndjson'
+        )
+    
+    return TrustedJSONResponse(await list_payload(
+        collection, query, sort_field, direction, model, limit=limit, cursor=cursor
+    ))
+
+# ============ LOST & FOUND SEARCH ============
+# Each item stores the edge n-grams (prefixes) of every token in its name,
+# description and location. A multikey index on search_prefixes answers
+# search-as-you-type queries with an index lookup; relevance is the number of
+# query terms hit, with hits in item_name weighted higher.
+SEARCH_MAX_PREFIX = 15
+SEARCH_MAX_TERMS = 8
+SEARCH_NAME_WEIGHT = 2
+LOST_FOUND_PROJECTION = {"_id": 0, "search_prefixes": 0, "name_prefixes": 0, "geo": 0, "match_tokens": 0}
+
+def tokenize(text: str) -> List[str]:
+    return re.findall(r'[a-z0-9]+', text.lower())
+
+def token_prefixes(text: str) -> List[str]:
+    prefixes = set()
+    for token in tokenize(text):
+        for end in range(1, min(len(token), SEARCH_MAX_PREFIX) + 1):
+            prefixes.add(token[:end])
+    return sorted(prefixes)
+
+def lost_found_search_fields(item_name: str, description: str, location: str) -> dict:
+    return {
+        'search_prefixes': token_prefixes(f'{item_name} {description} {location}'),
+        'name_prefixes': token_prefixes(item_name)
+    }
+
+async def search_lost_found(
+    query: dict,
+    search: str,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    stream: bool = False
+):
+    terms = sorted({term[:SEARCH_MAX_PREFIX] for term in tokenize(search)})[:SEARCH_MAX_TERMS]
+    if not terms:
+        return await list_documents(db.lost_found, query, 'date', -1, LostFoundItem,
+                                    limit=limit, cursor=cursor, stream=stream)
+    
+    pipeline = [
+        {'$match': {**query, 'search_prefixes': {'$all': terms}}},
+        {'$addFields': {'score': {'$add': [
+            len(terms),
+            {'$multiply': [SEARCH_NAME_WEIGHT, {'$size': {'$filter': {
+                'input': terms,
+                'cond': {'$in': ['$$this', '$name_prefixes']}
+            }}}]}
+        ]}}},
+    ]
+    if cursor:
+        score, date, last_id = decode_cursor(cursor, size=3, types=((int, float), datetime, str))
+        pipeline.append({'$match': {'$or': [
+            {'score': {'$lt': score}},
+            {'score': score, 'date': {'$lt': date}},
+            {'score': score, 'date': date, 'id': {'$lt': last_id}}
+        ]}})
+    pipeline.append({'$sort': {'score': -1, 'date': -1, 'id': -1}})
+    
+    paginated = limit is not None or cursor is not None
+    page_size = limit or DEFAULT_PAGE_SIZE
+    if stream:
+        fetch = limit
+    elif paginated:
+        fetch = page_size + 1
+    else:
+        fetch = LEGACY_LIST_LIMIT
+    if fetch:
+        pipeline.append({'$limit': fetch})
+    reader = trusted_read(LostFoundItem)
+    pipeline.append({'$project': {**reader.projection, 'score': 1}})
+    
+    if stream:
+        return StreamingResponse(
+            _ndjson_rows(db.lost_found.aggregate(pipeline), LostFoundItem),
+            media_type='application/x-ndjson'
+        )
+    
+    rows = await db.lost_found.aggregate(pipeline).to_list(fetch)
+    if not paginated:
+        note_documents_returned(len(rows))
+        return TrustedJSONResponse(reader.rows(rows))
+    
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        last = rows[-1]
+        next_cursor = encode_cursor(last['score'], last['date'], last['id'])
+    note_documents_returned(len(rows))
+    
+    return TrustedJSONResponse({'items': reader.rows(rows), 'next_cursor': next_cursor})
+
+async def reindex_lost_found_search() -> int:
+    reindexed = 0
+    projection = {'_id': 0, 'id': 1, 'item_name': 1, 'description': 1, 'location': 1}
+    async for doc in db.lost_found.find({}, projection):
+        await db.lost_found.update_one(
+            {'id': doc['id']},
+            {'$set': lost_found_search_fields(doc['item_name'], doc['description'], doc['location'])}
+        )
+        reindexed += 1
+    return reindexed
+
+# ============ CAMPUS LOCATIONS ============
+# Free-text locations are matched against a catalogue of campus places (the
+# longest alias found in the text wins) and stored alongside the text as
+# location_id/building/floor plus a GeoJSON point for the 2dsphere index.
+# The catalogue lives in campus_locations and is held in memory per worker.
+LOCATION_REFRESH_SECONDS = 300
+UNMAPPED_BUILDING = 'Unmapped'
+FLOOR_RE = re.compile(r'\b(?:(ground|basement|\d{1,2})(?:st|nd|rd|th)?\s+floor|floor\s+(\d{1,2}))\b')
+
+# Coordinates are approximate points on the IIIT Delhi campus
+DEFAULT_CAMPUS_LOCATIONS = [
+    CampusLocation(id='library', name='Library', building='Library', aliases=['library', 'lib', 'reading room'], floors=4, coordinates=[77.2733, 28.5452]),
+    CampusLocation(id='academic-block', name='New Academic Block', building='Academic Block', aliases=['academic block', 'new academic block', 'acad block', 'new acad'], floors=6, coordinates=[77.2726, 28.5447]),
+    CampusLocation(id='old-academic-block', name='Old Academic Block', building='Old Academic Block', aliases=['old academic block', 'old acad', 'old academic'], floors=4, coordinates=[77.2738, 28.5444]),
+    CampusLocation(id='rnd-block', name='R&D Block', building='R&D Block', aliases=['r&d block', 'rnd block', 'r&d', 'research block'], floors=6, coordinates=[77.2721, 28.5456]),
+    CampusLocation(id='seminar-block', name='Seminar Block', building='Seminar Block', aliases=['seminar block', 'seminar hall', 'auditorium'], floors=2, coordinates=[77.2730, 28.5441]),
+    CampusLocation(id='lecture-hall-complex', name='Lecture Hall Complex', building='Lecture Hall Complex', aliases=['lecture hall complex', 'lecture hall', 'lhc'], floors=3, coordinates=[77.2735, 28.5439]),
+    CampusLocation(id='mess', name='Mess', building='Mess', aliases=['mess', 'dining hall', 'dining'], floors=2, coordinates=[77.2716, 28.5462]),
+    CampusLocation(id='canteen', name='Canteen', building='Canteen', aliases=['canteen', 'cafeteria', 'cafe'], coordinates=[77.2728, 28.5436]),
+    CampusLocation(id='sports-complex', name='Sports Complex', building='Sports Complex', aliases=['sports complex', 'gym', 'football field', 'basketball court', 'sports ground'], floors=2, coordinates=[77.2708, 28.5467]),
+    CampusLocation(id='boys-hostel', name='Boys Hostel', building='Boys Hostel', aliases=['boys hostel', 'bh', 'h1'], floors=8, coordinates=[77.2712, 28.5473]),
+    CampusLocation(id='girls-hostel', name='Girls Hostel', building='Girls Hostel', aliases=['girls hostel', 'gh', 'h2'], floors=8, coordinates=[77.2703, 28.5470]),
+    CampusLocation(id='parking', name='Parking', building='Parking', aliases=['parking', 'parking lot'], coordinates=[77.2745, 28.5438]),
+    CampusLocation(id='main-gate', name='Main Gate', building='Main Gate', aliases=['main gate', 'gate 1', 'security gate'], coordinates=[77.2750, 28.5434]),
+]
+
+def location_doc(location: CampusLocation) -> dict:
+    doc = location.model_dump()
+    doc['geo'] = {'type': 'Point', 'coordinates': location.coordinates} if location.coordinates else None
+    return doc
+
+def parse_floor(text: str) -> Optional[int]:
+    match = FLOOR_RE.search(text.lower())
+    if not match:
+        return None
+    value = match.group(1) or match.group(2)
+    return {'ground': 0, 'basement': -1}[value] if value in ('ground', 'basement') else int(value)
+
+class LocationCatalogue:
+    def __init__(self):
+        self.locations = {}
+        self.aliases = {}  # tuple of alias tokens -> CampusLocation
+        self.max_alias_tokens = 1
+
+    async def load(self):
+        docs = await db.campus_locations.find({}, {'_id': 0}).to_list(None)
+        if not docs:
+            await db.campus_locations.bulk_write([
+                UpdateOne({'id': location.id}, {'$setOnInsert': location_doc(location)}, upsert=True)
+                for location in DEFAULT_CAMPUS_LOCATIONS
+            ])
+            docs = await db.campus_locations.find({}, {'_id': 0}).to_list(None)
+        locations = {doc['id']: CampusLocation.model_validate(doc) for doc in docs}
+        aliases = {}
+        for location in locations.values():
+            for alias in {location.name, location.building, *location.aliases}:
+                aliases.setdefault(tuple(tokenize(alias)), location)
+        aliases.pop((), None)
+        self.locations, self.aliases = locations, aliases
+        self.max_alias_tokens = max((len(alias) for alias in aliases), default=1)
+
+    def match(self, text: str) -> Optional[CampusLocation]:
+        tokens = tokenize(text)
+        for size in range(min(self.max_alias_tokens, len(tokens)), 0, -1):
+            for start in range(len(tokens) - size + 1):
+                location = self.aliases.get(tuple(tokens[start:start + size]))
+                if location:
+                    return location
+        return None
+
+    def resolve(self, location: str) -> Optional[CampusLocation]:
+        return self.locations.get(location) or self.match(location)
+
+location_catalogue = LocationCatalogue()
+
+def location_fields(text: str) -> dict:
+    location = location_catalogue.match(text)
+    return {
+        'location_id': location.id if location else None,
+        'building': location.building if location else None,
+        'floor': parse_floor(text),
+        'geo': {'type': 'Point', 'coordinates': location.coordinates} if location and location.coordinates else None
+    }
+
+async def normalize_locations() -> int:
+    """Recompute location fields for every complaint and lost & found item from its free text."""
+    updated = 0
+    for collection in (db.complaints, db.lost_found):
+        pending = []
+        projection = {'_id': 0, 'id': 1, 'location': 1, 'location_id': 1, 'building': 1, 'floor': 1, 'geo': 1}
+        async for doc in collection.find({}, projection):
+            fields = location_fields(doc.get('location') or '')
+            # Unchanged documents keep their updated_at so delta sync doesn't resend them
+            if all(doc.get(field) == value for field, value in fields.items()):
+                continue
+            fields['updated_at'] = datetime.now(timezone.utc)
+            pending.append(UpdateOne({'id': doc['id']}, {'$set': fields}))
+            if len(pending) >= BULK_CHUNK_SIZE:
+                updated += (await collection.bulk_write(pending, ordered=False)).modified_count
+                pending = []
+        if pending:
+            updated += (await collection.bulk_write(pending, ordered=False)).modified_count
+    response_cache.invalidate('complaints')
+    response_cache.invalidate('hotspots')
+    response_cache.invalidate('lost_found')
+    return updated
+
+async def location_hotspots(collection, date_field: str, since: datetime, breakdown: str, open_statuses: List[str]) -> List[dict]:
+    """Counts per building since a date, split by the breakdown field, with how many are still open."""
+    pipeline = [
+        {'$match': {date_field: {'$gte': since}}},
+        {'$group': {
+            '_id': {'building': '$building', 'value': f'${breakdown}'},
+            'count': {'$sum': 1},
+            'open': {'$sum': {'$cond': [{'$in': ['$status', open_statuses]}, 1, 0]}}
+        }},
+        {'$group': {
+            '_id': '$_id.building',
+            'total': {'$sum': '$count'},
+            'open': {'$sum': '$open'},
+            'values': {'$push': {'value': '$_id.value', 'count': '$count'}}
+        }},
+        {'$sort': {'total': -1, '_id': 1}},
+    ]
+    rows = await collection.aggregate(pipeline).to_list(None)
+    return [
+        {
+            'building': row['_id'] or UNMAPPED_BUILDING,
+            'total': row['total'],
+            'open': row['open'],
+            f'by_{breakdown}': {entry['value']: entry['count'] for entry in row['values'] if entry.get('value')}
+        }
+        for row in rows
+    ]
+
+async def location_refresher():
+    while True:
+        await asyncio.sleep(LOCATION_REFRESH_SECONDS)
+        try:
+            await location_catalogue.load()
+        except Exception:
+            logger.exception('Refreshing campus locations failed')
+
+# ============ REPORT MATCHING ============
+# New lost items are scored against active found items (and vice versa), and
+# new complaints against recent open complaints, once at insert time. Every
+# report stores its normalised content tokens in match_tokens; a multikey index
+# on it is the blocking step, so only reports sharing at least one token (in a
+# time window) are scored rather than comparing every pair. Candidates are read
+# newest first with id as the tie-break, so the capped set is deterministic.
+# Scores combine character-trigram similarity of the text, location, time
+# proximity and, when both have images, the Hamming distance of their
+# perceptual hashes.
+MATCH_STOPWORDS = frozenset('a an and at by for from i in is it my near of on or the to with was has have this that lost found please'.split())
+MATCH_WINDOW = timedelta(days=30)
+DUPLICATE_WINDOW = timedelta(days=14)
+MATCH_CANDIDATE_LIMIT = 200
+MATCH_THRESHOLD = 0.5
+DUPLICATE_THRESHOLD = 0.65
+MAX_MATCHES = 5
+MATCH_WEIGHTS = {'text': 0.55, 'location': 0.2, 'time': 0.15, 'image': 0.1}
+MATCH_TIME_SCALE_DAYS = 7
+MATCH_RETENTION = timedelta(days=60)  # TTL on recorded matches
+MATCH_FIELDS = {
+    '_id': 0, 'id': 1, 'type': 1, 'item_name': 1, 'title': 1, 'description': 1, 'category': 1,
+    'location_id': 1, 'building': 1, 'geo': 1, 'date': 1, 'created_at': 1, 'image_phash': 1
+}
+
+def match_tokens(*texts: str) -> List[str]:
+    tokens = set()
+    for token in tokenize(' '.join(texts)):
+        if len(token) < 2 or token in MATCH_STOPWORDS:
+            continue
+        # Cheap plural folding so "keys" blocks with "key"
+        tokens.add(token[:-1] if len(token) > 3 and token.endswith('s') and not token.endswith('ss') else token)
+    return sorted(tokens)
+
+def trigrams(text: str) -> set:
+    padded = f"  {' '.join(tokenize(text))} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def jaccard(a: set, b: set) -> float:
+    return len(a & b) / len(a | b) if a and b else 0.0
+
+def haversine_m(a: List[float], b: List[float]) -> float:
+    lng1, lat1, lng2, lat2 = map(math.radians, (*a, *b))
+    h = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    return 2 * 6371000 * math.asin(math.sqrt(h))
+
+def location_similarity(a: dict, b: dict) -> float:
+    if a.get('location_id') and a.get('location_id') == b.get('location_id'):
+        return 1.0
+    if a.get('building') and a.get('building') == b.get('building'):
+        return 0.8
+    if a.get('geo') and b.get('geo'):
+        return max(0.0, 1 - haversine_m(a['geo']['coordinates'], b['geo']['coordinates']) / 500)
+    return 0.0
+
+def report_similarity(a: dict, b: dict, name_field: str, date_field: str) -> tuple:
+    """Weighted similarity of two report documents and the per-signal scores behind it."""
+    name_score = jaccard(trigrams(a.get(name_field, '')), trigrams(b.get(name_field, '')))
+    full_score = jaccard(trigrams(f"{a.get(name_field, '')} {a.get('description', '')}"),
+                         trigrams(f"{b.get(name_field, '')} {b.get('description', '')}"))
+    days_apart = abs((a[date_field] - b[date_field]).total_seconds()) / 86400
+    signals = {
+        'text': round(0.5 * name_score + 0.5 * full_score, 3),
+        'location': round(location_similarity(a, b), 3),
+        'time': round(math.exp(-days_apart / MATCH_TIME_SCALE_DAYS), 3)
+    }
+    if a.get('image_phash') and b.get('image_phash'):
+        distance = bin(int(a['image_phash'], 16) ^ int(b['image_phash'], 16)).count('1')
+        signals['image'] = round(max(0.0, 1 - distance / 32), 3)
+    # Missing signals (no image on either side) drop out of the weighting instead of counting as 0
+    total_weight = sum(MATCH_WEIGHTS[name] for name in signals)
+    score = sum(MATCH_WEIGHTS[name] * value for name, value in signals.items()) / total_weight
+    return round(score, 3), signals
+
+async def match_lost_found_item(item_id: str) -> int:
+    """Score an item against active items of the opposite type and record the best matches."""
+    item = await db.lost_found.find_one({'id': item_id}, {**MATCH_FIELDS, 'match_tokens': 1, 'status': 1})
+    if not item or item.get('status') != 'active' or not item.get('match_tokens'):
+        return 0
+    when = item['date']
+    candidates = db.lost_found.find({
+        'type': 'found' if item['type'] == 'lost' else 'lost',
+        'status': 'active',
+        'match_tokens': {'$in': item['match_tokens']},
+        'date': {'$gte': when - MATCH_WINDOW, '$lte': when + MATCH_WINDOW}
+    }, MATCH_FIELDS).sort([('date', DESCENDING), ('id', DESCENDING)]).limit(MATCH_CANDIDATE_LIMIT)
+    scored = []
+    async for candidate in candidates:
+        score, signals = report_similarity(item, candidate, 'item_name', 'date')
+        if score >= MATCH_THRESHOLD:
+            scored.append((score, signals, candidate))
+    scored.sort(key=lambda entry: entry[0], reverse=True)
+    now = datetime.now(timezone.utc)
+    for score, signals, candidate in scored[:MAX_MATCHES]:
+        lost, found = (item, candidate) if item['type'] == 'lost' else (candidate, item)
+        await db.lost_found_matches.update_one(
+            {'lost_id': lost['id'], 'found_id': found['id']},
+            {'$set': {'score': score, 'signals': signals, 'updated_at': now, 'expires_at': now + MATCH_RETENTION}},
+            upsert=True
+        )
+        change_hub.publish('lost_found', 'matched', {'lost_id': lost['id'], 'found_id': found['id'], 'score': score})
+    return min(len(scored), MAX_MATCHES)
+
+async def flag_duplicate_complaint(complaint_id: str) -> Optional[str]:
+    """Mark a complaint as a likely duplicate of the most similar recent open complaint in the same category."""
+    complaint = await db.complaints.find_one({'id': complaint_id}, {**MATCH_FIELDS, 'match_tokens': 1})
+    if not complaint or not complaint.get('match_tokens'):
+        return None
+    since = complaint['created_at'] - DUPLICATE_WINDOW
+    candidates = db.complaints.find({
+        'status': {'$in': OPEN_COMPLAINT_STATUSES},
+        'match_tokens': {'$in': complaint['match_tokens']},
+        'category': complaint['category'],
+        'created_at': {'$gte': since, '$lte': complaint['created_at']},
+        'id': {'$ne': complaint_id}
+    }, MATCH_FIELDS).sort([('created_at', DESCENDING), ('id', DESCENDING)]).limit(MATCH_CANDIDATE_LIMIT)
+    best = None
+    async for candidate in candidates:
+        score, _ = report_similarity(complaint, candidate, 'title', 'created_at')
+        if score >= DUPLICATE_THRESHOLD and (best is None or score > best[0]):
+            best = (score, candidate['id'])
+    if best is None:
+        return None
+    score, original_id = best
+    await db.complaints.update_one(
+        {'id': complaint_id},
+        {'$set': {'duplicate_of': original_id, 'duplicate_score': score, 'updated_at': datetime.now(timezone.utc)}}
+    )
+    await record_complaint_event(complaint_id, 'system', 'duplicate', {'duplicate_of': [None, original_id]}, f'Similarity {score}')
+    response_cache.invalidate('complaints')
+    change_hub.publish('complaints', 'updated', {'id': complaint_id, 'duplicate_of': original_id, 'duplicate_score': score})
+    return original_id
+
+async def process_new_report(collection, doc_id: str, image_hash: Optional[str]):
+    """Post-insert work for a report: thumbnail and perceptual hash first, then matching."""
+    if image_hash:
+        await generate_thumbnail(collection, doc_id, image_hash)
+    try:
+        if collection.name == 'lost_found':
+            await match_lost_found_item(doc_id)
+        else:
+            await flag_duplicate_complaint(doc_id)
+    except Exception:
+        logger.exception(f'Matching failed for {collection.name} {doc_id}')
+
+async def rebuild_match_index() -> dict:
+    """Recompute match_tokens everywhere, then rematch active lost items and recent open complaints."""
+    counts = {'lost_found': 0, 'complaints': 0, 'matched': 0, 'duplicates': 0}
+    sources = {'lost_found': ('item_name', 'description'), 'complaints': ('title', 'description')}
+    for name, fields in sources.items():
+        pending = []
+        async for doc in db[name].find({}, {'_id': 0, 'id': 1, **{field: 1 for field in fields}}):
+            pending.append(UpdateOne({'id': doc['id']}, {'$set': {'match_tokens': match_tokens(*(doc.get(field, '') for field in fields))}}))
+            if len(pending) >= BULK_CHUNK_SIZE:
+                await db[name].bulk_write(pending, ordered=False)
+                pending = []
+            counts[name] += 1
+        if pending:
+            await db[name].bulk_write(pending, ordered=False)
+    async for doc in db.lost_found.find({'type': 'lost', 'status': 'active'}, {'_id': 0, 'id': 1}):
+        counts['matched'] += await match_lost_found_item(doc['id'])
+    since = datetime.now(timezone.utc) - DUPLICATE_WINDOW
+    open_recent = db.complaints.find(
+        {'status': {'$in': OPEN_COMPLAINT_STATUSES}, 'created_at': {'$gte': since}, 'duplicate_of': None},
+        {'_id': 0, 'id': 1}
+    )
+    async for doc in open_recent:
+        if await flag_duplicate_complaint(doc['id']):
+            counts['duplicates'] += 1
+    return counts
+
+# ============ IMAGE STORE ============
+# Uploaded images are decoded once and stored content-addressed by SHA-256, so
+# identical uploads share one blob and documents only carry the hash.
+IMAGE_HASH_RE = re.compile(r'^[0-9a-f]{64}$')
+IMAGE_CHUNK_SIZE = 64 * 1024
+
+def sniff_image_mime(header: bytes) -> str:
+    if header.startswith(b'\xff\xd8\xff'):
+        return 'image/jpeg'
+    if header.startswith(b'\x89PNG\r\n\x1a\n'):
+        return 'image/png'
+    if header[:4] == b'RIFF' and header[8:12] == b'WEBP':
+        return 'image/webp'
+    if header[:6] in (b'GIF87a', b'GIF89a'):
+        return 'image/gif'
+    return 'application/octet-stream'
+
+class FilesystemImageStore:
+    def __init__(self, root: Path):
+        self.root = root
+
+    def _path(self, image_hash: str) -> Path:
+        return self.root / image_hash[:2] / image_hash
+
+    def _write(self, image_hash: str, data: bytes):
+        path = self._path(image_hash)
+        if path.exists():
+            return
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with tempfile.NamedTemporaryFile(dir=path.parent, delete=False) as tmp:
+            tmp.write(data)
+        os.replace(tmp.name, path)
+
+    def _read(self, image_hash: str, start: int, length: int) -> bytes:
+        with open(self._path(image_hash), 'rb') as f:
+            f.seek(start)
+            return f.read(length)
+
+    async def put(self, image_hash: str, data: bytes):
+        await asyncio.to_thread(self._write, image_hash, data)
+
+    async def size(self, image_hash: str) -> Optional[int]:
+        try:
+            return (await asyncio.to_thread(self._path(image_hash).stat)).st_size
+        except FileNotFoundError:
+            return None
+
+    async def read(self, image_hash: str, start: int, length: int) -> bytes:
+        return await asyncio.to_thread(self._read, image_hash, start, length)
+
+class GridFSImageStore:
+    def __init__(self, database):
+        self.bucket = AsyncIOMotorGridFSBucket(database, bucket_name='images')
+
+    async def _find(self, image_hash: str) -> Optional[dict]:
+        async for grid_file in self.bucket.find({'filename': image_hash}).limit(1):
+            return grid_file
+        return None
+
+    async def put(self, image_hash: str, data: bytes):
+        if await self._find(image_hash):
+            return
+        await self.bucket.upload_from_stream(image_hash, data)
+
+    async def size(self, image_hash: str) -> Optional[int]:
+        grid_file = await self._find(image_hash)
+        return grid_file.length if grid_file else None
+
+    async def read(self, image_hash: str, start: int, length: int) -> bytes:
+        stream = await self.bucket.open_download_stream_by_name(image_hash)
+        stream.seek(start)
+        return await stream.read(length)
+
+image_store = GridFSImageStore(db) if IMAGE_STORE_BACKEND == 'gridfs' else FilesystemImageStore(IMAGE_STORE_DIR)
+
+def decode_image(image_base64: str) -> bytes:
+    # Accept bare base64 as sent by the frontend, or a full data: URL
+    if image_base64.startswith('data:'):
+        image_base64 = image_base64.split(',', 1)[-1]
+    try:
+        data = base64.b64decode(image_base64, validate=True)
+    except (binascii.Error, ValueError):
+        raise HTTPException(status_code=400, detail='imageBase64 is not valid base64')
+    if len(data) > MAX_IMAGE_BYTES:
+        raise HTTPException(status_code=413, detail='Image too large')
+    return data
+
+async def store_image(data: bytes) -> str:
+    image_hash = hashlib.sha256(data).hexdigest()
+    await image_store.put(image_hash, data)
+    return image_hash
+
+async def store_upload_image(image_base64: Optional[str]) -> Optional[str]:
+    if not image_base64:
+        return None
+    return await store_image(decode_image(image_base64))
+
+def parse_range(range_header: str, size: int) -> tuple:
+    # Single byte range only: bytes=start-end, bytes=start- or bytes=-suffix
+    match = re.fullmatch(r'bytes=(\d*)-(\d*)', range_header.strip())
+    if not match or match.groups() == ('', ''):
+        raise HTTPException(status_code=416, detail='Invalid range', headers={'Content-Range': f'bytes */{size}'})
+    first, last = match.groups()
+    if first:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    else:
+        start = max(size - int(last), 0)
+        end = size - 1
+    if start > end or start >= size:
+        raise HTTPException(status_code=416, detail='Range not satisfiable', headers={'Content-Range': f'bytes */{size}'})
+    return start, end
+
+async def _image_chunks(image_hash: str, start: int, end: int):
+    position = start
+    while position <= end:
+        length = min(IMAGE_CHUNK_SIZE, end - position + 1)
+        yield await image_store.read(image_hash, position, length)
+        position += length
+
+async def migrate_inline_images() -> int:
+    """Move legacy imageBase64 fields into the image store. Safe to re-run."""
+    migrated = 0
+    for collection in (db.lost_found, db.complaints):
+        async for doc in collection.find({'imageBase64': {'$type': 'string'}}, {'_id': 0, 'id': 1, 'imageBase64': 1}):
+            try:
+                image_hash = await store_upload_image(doc['imageBase64'])
+            except HTTPException as e:
+                logger.warning(f"Skipping image on {collection.name} {doc['id']}: {e.detail}")
+                continue
+            await collection.update_one(
+                {'id': doc['id']},
+                {'$set': {'image_hash': image_hash, 'updated_at': datetime.now(timezone.utc)}, '$unset': {'imageBase64': ''}}
+            )
+            migrated += 1
+    return migrated
+
+# ============ THUMBNAILS ============
+# Thumbnails are rendered in a process pool after the upload response is sent,
+# so Pillow's decode/resize never runs on the event loop. Pillow is optional:
+# without it images are still served, just without thumbnails.
+try:
+    from PIL import Image, ImageOps, features as pil_features
+except ImportError:  # pragma: no cover - depends on deployment
+    Image = None
+
+THUMBNAIL_SIZE = (400, 300)
+THUMBNAIL_QUALITY = 75
+_thumbnail_pool: Optional[ProcessPoolExecutor] = None
+
+def difference_hash(img) -> str:
+    """64-bit dHash: whether each pixel of a 9x8 greyscale copy is brighter than its right neighbour."""
+    pixels = list(img.convert('L').resize((9, 8), Image.Resampling.LANCZOS).getdata())
+    bits = 0
+    for row in range(8):
+        for col in range(8):
+            bits = (bits << 1) | (pixels[row * 9 + col] > pixels[row * 9 + col + 1])
+    return f'{bits:016x}'
+
+def render_thumbnail(data: bytes) -> tuple:
+    """Decode an image and return a fixed-size WebP (or JPEG) thumbnail and its perceptual hash. Runs in a worker process."""
+    with Image.open(io.BytesIO(data)) as img:
+        img = ImageOps.exif_transpose(img).convert('RGB')
+        thumb = ImageOps.fit(img, THUMBNAIL_SIZE, Image.Resampling.LANCZOS)
+    out = io.BytesIO()
+    thumb_format = 'WEBP' if pil_features.check('webp') else 'JPEG'
+    thumb.save(out, thumb_format, quality=THUMBNAIL_QUALITY)
+    return out.getvalue(), difference_hash(thumb)
+
+def get_thumbnail_pool() -> ProcessPoolExecutor:
+    global _thumbnail_pool
+    if _thumbnail_pool is None:
+        # spawn rather than fork: the parent holds Motor's background threads
+        _thumbnail_pool = ProcessPoolExecutor(
+            max_workers=THUMBNAIL_WORKERS,
+            mp_context=multiprocessing.get_context('spawn')
+        )
+    return _thumbnail_pool
+
+async def generate_thumbnail(collection, doc_id: str, image_hash: str) -> Optional[str]:
+    """Attach a thumbnail and perceptual hash to a document; returns the perceptual hash."""
+    if Image is None:
+        return None
+    try:
+        existing = await db.image_thumbnails.find_one({'image_hash': image_hash}, {'_id': 0})
+        # Thumbnails made before perceptual hashing was added are rendered again once
+        if existing and existing.get('image_phash'):
+            thumbnail_hash, image_phash = existing['thumbnail_hash'], existing['image_phash']
+        else:
+            size = await image_store.size(image_hash)
+            data = await image_store.read(image_hash, 0, size)
+            loop = asyncio.get_running_loop()
+            thumbnail, image_phash = await loop.run_in_executor(get_thumbnail_pool(), render_thumbnail, data)
+            thumbnail_hash = await store_image(thumbnail)
+            await db.image_thumbnails.update_one(
+                {'image_hash': image_hash},
+                {'$set': {'thumbnail_hash': thumbnail_hash, 'image_phash': image_phash}},
+                upsert=True
+            )
+        await collection.update_one({'id': doc_id}, {'$set': {
+            'thumbnail_hash': thumbnail_hash, 'image_phash': image_phash, 'updated_at': datetime.now(timezone.utc)
+        }})
+        if collection.name in response_cache.ttls:
+            response_cache.invalidate(collection.name)
+        return image_phash
+    except Exception:
+        logger.exception(f'Thumbnail generation failed for image {image_hash}')
+        return None
+
+async def backfill_thumbnails() -> int:
+    generated = 0
+    for collection in (db.lost_found, db.complaints):
+        query = {'image_hash': {'$type': 'string'}, 'thumbnail_hash': None}
+        async for doc in collection.find(query, {'_id': 0, 'id': 1, 'image_hash': 1}):
+            await generate_thumbnail(collection, doc['id'], doc['image_hash'])
+            generated += 1
+    return generated
+
+# ============ MESS RATING ROLLUPS ============
+# Ratings are pre-aggregated into one sum/count/histogram document per
+# (day, meal_type), plus an all-time bucket, so reading averages and analytics
+# never scans mess_feedback.
+MEAL_TYPES = ['breakfast', 'lunch', 'snacks', 'dinner']
+ALL_TIME_BUCKET = 'all'
+
+async def record_mess_ratings(ratings: List[tuple]):
+    """Fold (meal_type, rating, timestamp) tuples into rollup increments and apply them in one bulk_write."""
+    increments = {}
+    for meal_type, rating, timestamp in ratings:
+        # Naive timestamps (legacy rows, or a client without tz_aware) are UTC
+        timestamp = timestamp.astimezone(timezone.utc) if timestamp.tzinfo else timestamp.replace(tzinfo=timezone.utc)
+        day = timestamp.strftime('%Y-%m-%d')
+        for bucket in (day, ALL_TIME_BUCKET):
+            inc = increments.setdefault((bucket, meal_type), {'sum': 0, 'count': 0})
+            inc['sum'] += rating
+            inc['count'] += 1
+            inc[f'hist.{rating}'] = inc.get(f'hist.{rating}', 0) + 1
+    if not increments:
+        return
+    await db.mess_rating_rollups.bulk_write([
+        UpdateOne({'day': bucket, 'meal_type': meal_type}, {'$inc': inc}, upsert=True)
+        for (bucket, meal_type), inc in increments.items()
+    ], ordered=False)
+
+async def record_mess_rating(meal_type: str, rating: int, timestamp: datetime):
+    await record_mess_ratings([(meal_type, rating, timestamp)])
+
+async def backfill_mess_rating_rollups() -> int:
+    """Rebuild mess_rating_rollups from the raw mess_feedback collection.
+
+    The rebuilt counters are written to a scratch collection and swapped in
+    with a rename, so readers never see a half-built rollup. Feedback that
+    arrives while the backfill runs is not counted; run it off-peak.
+    """
+    pipeline = [
+        {'$match': {'meal_type': {'$in': MEAL_TYPES}, 'rating': {'$type': 'number'}}},
+        {'$group': {
+            '_id': {
+                'day': {'$dateToString': {'format': '%Y-%m-%d', 'date': '$timestamp'}},
+                'meal_type': '$meal_type',
+                'rating': '$rating'
+            },
+            'count': {'$sum': 1}
+        }}
+    ]
+    buckets = {}
+    async for row in db.mess_feedback.aggregate(pipeline):
+        key = row['_id']
+        rating = int(key['rating'])
+        for day in (key['day'], ALL_TIME_BUCKET):
+            rollup = buckets.setdefault(
+                (day, key['meal_type']),
+                {'day': day, 'meal_type': key['meal_type'], 'sum': 0, 'count': 0, 'hist': {}}
+            )
+            rollup['sum'] += rating * row['count']
+            rollup['count'] += row['count']
+            rollup['hist'][str(rating)] = rollup['hist'].get(str(rating), 0) + row['count']
+    rollups = list(buckets.values())
+
+    scratch = db.mess_rating_rollups_rebuild
+    await scratch.drop()
+    if rollups:
+        await scratch.insert_many(rollups)
+        await scratch.create_index([('day', 1), ('meal_type', 1)], unique=True)
+        await scratch.rename('mess_rating_rollups', dropTarget=True)
+    else:
+        await db.mess_rating_rollups.delete_many({})
+    return len(rollups)
+
+# ============ RESPONSE CACHE ============
+# Hot read endpoints are cached per (namespace, variant) as pre-encoded JSON
+# bytes with an ETag. Entries expire after the namespace TTL and write routes
+# drop their namespace explicitly; the TTL bounds staleness across workers.
+RESPONSE_CACHE_TTLS = {
+    'ratings': 30,
+    'analytics': 300,
+    'equipment': 10,
+    'complaints': 10,
+    # Dashboards tolerate a minute of staleness; new reports don't invalidate these
+    'hotspots': 60,
+    'lost_found': 30,
+}
+
+class CacheEntry:
+    def __init__(self, body: bytes, expires_at: float):
+        self.body = body
+        self.etag = f'"{hashlib.sha1(body).hexdigest()}"'
+        self.expires_at = expires_at
+
+class ResponseCache:
+    def __init__(self, ttls: dict):
+        self.ttls = ttls
+        self.entries = {}
+        self.locks = {}
+        self.generations = {namespace: 0 for namespace in ttls}
+        self.stats = {namespace: {'hits': 0, 'misses': 0, 'invalidations': 0} for namespace in ttls}
+
+    def invalidate(self, namespace: str):
+        self.generations[namespace] += 1
+        self.stats[namespace]['invalidations'] += 1
+        for key in [key for key in self.entries if key[0] == namespace]:
+            del self.entries[key]
+
+    def _fresh(self, key) -> Optional[CacheEntry]:
+        entry = self.entries.get(key)
+        if entry and entry.expires_at > time.monotonic():
+            return entry
+        return None
+
+    async def get_or_build(self, namespace: str, variant: str, build) -> CacheEntry:
+        key = (namespace, variant)
+        entry = self._fresh(key)
+        if entry:
+            self.stats[namespace]['hits'] += 1
+            return entry
+        # Single-flight: concurrent misses on one key wait for a single rebuild
+        async with self.locks.setdefault(key, asyncio.Lock()):
+            entry = self._fresh(key)
+            if entry:
+                self.stats[namespace]['hits'] += 1
+                return entry
+            self.stats[namespace]['misses'] += 1
+            generation = self.generations[namespace]
+            payload = await build()
+            body = dump_json(payload)
+            entry = CacheEntry(body, time.monotonic() + self.ttls[namespace])
+            # A write that landed mid-build invalidated this data; serve it once but don't keep it
+            if generation == self.generations[namespace]:
+                self.entries[key] = entry
+            return entry
+
+    def snapshot(self) -> dict:
+        return {
+            namespace: {**counters, 'entries': sum(1 for key in self.entries if key[0] == namespace)}
+            for namespace, counters in self.stats.items()
+        }
+
+response_cache = ResponseCache(RESPONSE_CACHE_TTLS)
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    return if_none_match.strip() == '*' or etag in [tag.strip() for tag in if_none_match.split(',')]
+
+async def cached_response(namespace: str, variant: str, build, if_none_match: Optional[str]) -> Response:
+    entry = await response_cache.get_or_build(namespace, variant, build)
+    headers = {'ETag': entry.etag, 'Cache-Control': 'no-cache'}
+    if etag_matches(if_none_match, entry.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=entry.body, media_type='application/json', headers=headers)
+
+# ============ MESS MENU STORE ============
+# Menus are stored one document per date in mess_menus. Each worker keeps the
+# encoded JSON payload for every day in a rolling window in memory, so the
+# morning rush on /api/mess/menu is a dict lookup. The window is reloaded after
+# imports and periodically to pick up imports handled by other workers. Days
+# outside the window are cached too, in an LRU capped at MENU_EXTRA_DAYS.
+MENU_WINDOW_PAST_DAYS = 7
+MENU_WINDOW_FUTURE_DAYS = 31
+MENU_EXTRA_DAYS = 64
+MENU_REFRESH_SECONDS = 300
+MAX_MENU_RANGE_DAYS = 31
+MAX_MENU_IMPORT_ROWS = 400
+
+# Served for days no menu has been uploaded for
+DEFAULT_MENU = {
+    'breakfast': ['Idli Sambhar', 'Vada', 'Chutney', 'Tea/Coffee'],
+    'lunch': ['Rajma Chawal', 'Roti', 'Salad', 'Curd'],
+    'snacks': ['Samosa', 'Tea', 'Biscuits'],
+    'dinner': ['Paneer Butter Masala', 'Roti', 'Dal', 'Rice', 'Salad']
+}
+
+def parse_day(value: str, field: str = 'date') -> str:
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').strftime('%Y-%m-%d')
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=400, detail=f'{field} must be in YYYY-MM-DD format')
+
+def day_range(start: str, end: str) -> List[str]:
+    first = datetime.strptime(start, '%Y-%m-%d')
+    count = (datetime.strptime(end, '%Y-%m-%d') - first).days + 1
+    return [(first + timedelta(days=offset)).strftime('%Y-%m-%d') for offset in range(count)]
+
+class MenuStore:
+    def __init__(self, window_start: str = '', window_end: str = ''):
+        self.window_start = window_start
+        self.window_end = window_end
+        self.menus = {}
+        self.payloads = {}
+        self.extra = OrderedDict()
+
+    def _touch(self, day: str):
+        if day in self.extra:
+            self.extra.move_to_end(day)
+
+    def _remember(self, day: str, doc: Optional[dict]) -> MessMenu:
+        menu = MessMenu(date=day, **{meal: (doc or DEFAULT_MENU).get(meal, []) for meal in MEAL_TYPES})
+        self.menus[day] = menu
+        self.payloads[day] = CacheEntry(menu.model_dump_json().encode(), float('inf'))
+        if not self.window_start <= day <= self.window_end:
+            self.extra[day] = None
+            self.extra.move_to_end(day)
+            while len(self.extra) > MENU_EXTRA_DAYS:
+                evicted, _ = self.extra.popitem(last=False)
+                del self.menus[evicted], self.payloads[evicted]
+        return menu
+
+    async def load(self, start: str, end: str) -> dict:
+        docs = {
+            doc['date']: doc
+            async for doc in db.mess_menus.find({'date': {'$gte': start, '$lte': end}}, {'_id': 0})
+        }
+        return {day: self._remember(day, docs.get(day)) for day in day_range(start, end)}
+
+    async def load_window(self):
+        today = datetime.now(timezone.utc)
+        start = (today - timedelta(days=MENU_WINDOW_PAST_DAYS)).strftime('%Y-%m-%d')
+        end = (today + timedelta(days=MENU_WINDOW_FUTURE_DAYS)).strftime('%Y-%m-%d')
+        # Build off to the side and swap, so readers never see a half-loaded window
+        fresh = MenuStore(start, end)
+        await fresh.load(start, end)
+        self.window_start, self.window_end = start, end
+        self.menus, self.payloads, self.extra = fresh.menus, fresh.payloads, fresh.extra
+
+    async def payload(self, day: str) -> CacheEntry:
+        if day not in self.payloads:
+            await self.load(day, day)
+        self._touch(day)
+        return self.payloads[day]
+
+    async def range(self, start: str, end: str) -> List[MessMenu]:
+        days = day_range(start, end)
+        cached = {day: self.menus[day] for day in days if day in self.menus}
+        missing = [day for day in days if day not in cached]
+        if missing:
+            cached.update(await self.load(missing[0], missing[-1]))
+        for day in days:
+            self._touch(day)
+        return [cached[day] for day in days]
+
+menu_store = MenuStore()
+
+async def import_menus(menus: List[MessMenu]) -> int:
+    now = datetime.now(timezone.utc)
+    result = await db.mess_menus.bulk_write([
+        UpdateOne(
+            {'date': menu.date},
+            {'$set': {**menu.model_dump(), 'updated_at': now}},
+            upsert=True
+        )
+        for menu in menus
+    ], ordered=False)
+    await menu_store.load_window()
+    return result.upserted_count + result.modified_count
+
+def parse_menu_csv(text: str) -> List[MessMenu]:
+    # Columns: date,breakfast,lunch,snacks,dinner with items separated by ';'
+    reader = csv.DictReader(io.StringIO(text))
+    missing = {'date', *MEAL_TYPES} - set(reader.fieldnames or [])
+    if missing:
+        raise HTTPException(status_code=400, detail=f"CSV is missing columns: {', '.join(sorted(missing))}")
+    return [
+        MessMenu(
+            date=row['date'].strip(),
+            **{meal: [item.strip() for item in (row[meal] or '').split(';') if item.strip()] for meal in MEAL_TYPES}
+        )
+        for row in reader
+    ]
+
+async def menu_refresher():
+    while True:
+        try:
+            await menu_store.load_window()
+        except Exception:
+            logger.exception('Refreshing mess menus failed')
+        await asyncio.sleep(MENU_REFRESH_SECONDS)
+
+# ============ MESS ANALYTICS ============
+# Analytics read the per-day rollups (a few documents per day, however many
+# ratings there were) and do the grouping in pandas. Dish breakdowns attribute
+# each meal's ratings to every dish on that day's menu.
+MAX_ANALYTICS_DAYS = 400
+RATING_VALUES = [1, 2, 3, 4, 5]
+
+def _averages(frame: pd.DataFrame, by: List[str]) -> pd.DataFrame:
+    grouped = frame.groupby(by, as_index=False)[['sum', 'count']].sum()
+    grouped['average'] = (grouped['sum'] / grouped['count']).round(2)
+    return grouped.drop(columns='sum')
+
+async def mess_analytics(start: str, end: str, granularity: str) -> dict:
+    rollups = await db.mess_rating_rollups.find(
+        {'day': {'$gte': start, '$lte': end}}, {'_id': 0}
+    ).to_list(None)
+    report = {
+        'start': start,
+        'end': end,
+        'granularity': granularity,
+        'overall': {},
+        'trends': [],
+        'distribution': {meal_type: {str(r): 0 for r in RATING_VALUES} for meal_type in MEAL_TYPES},
+        'dishes': []
+    }
+    if not rollups:
+        return report
+    
+    frame = pd.DataFrame(rollups, columns=['day', 'meal_type', 'sum', 'count'])
+    hist = np.array([
+        [rollup.get('hist', {}).get(str(r), 0) for r in RATING_VALUES] for rollup in rollups
+    ])
+    days = pd.to_datetime(frame['day'])
+    if granularity == 'week':
+        days = days.dt.to_period('W-SUN').dt.start_time
+    frame['period'] = days.dt.strftime('%Y-%m-%d')
+    
+    report['overall'] = {
+        row['meal_type']: {'average': row['average'], 'count': int(row['count'])}
+        for row in _averages(frame, ['meal_type']).to_dict('records')
+    }
+    report['trends'] = [
+        {**row, 'count': int(row['count'])}
+        for row in _averages(frame, ['period', 'meal_type']).to_dict('records')
+    ]
+    
+    hist_frame = pd.DataFrame(hist, columns=[str(r) for r in RATING_VALUES])
+    hist_frame['meal_type'] = frame['meal_type']
+    for meal_type, counts in hist_frame.groupby('meal_type').sum().iterrows():
+        report['distribution'][meal_type] = {rating: int(count) for rating, count in counts.items()}
+    
+    menus = await db.mess_menus.find({'date': {'$gte': start, '$lte': end}}, {'_id': 0}).to_list(None)
+    if menus:
+        dishes = pd.DataFrame(
+            [(menu['date'], meal_type, dish) for menu in menus for meal_type in MEAL_TYPES for dish in menu.get(meal_type, [])],
+            columns=['day', 'meal_type', 'dish']
+        )
+        rated = dishes.merge(frame[['day', 'meal_type', 'sum', 'count']], on=['day', 'meal_type'])
+        if not rated.empty:
+            by_dish = _averages(rated, ['meal_type', 'dish']).sort_values(['count', 'average'], ascending=False)
+            report['dishes'] = [{**row, 'count': int(row['count'])} for row in by_dish.to_dict('records')]
+    
+    return report
+
+# ============ CHANGE FEED ============
+# Mutating routes publish small delta events to an in-process hub; SSE and
+# WebSocket clients subscribe per topic instead of re-polling full lists.
+# Event ids are '<epoch>:<seq>': a client resuming with an id from another
+# process lifetime, or one older than the retained history, gets a 'reset'
+# event telling it to refetch once and then follow the live feed.
+CHANGE_TOPICS = ('equipment', 'complaints', 'lost_found')
+CHANGE_HISTORY_SIZE = 1000
+SUBSCRIBER_QUEUE_SIZE = 256
+KEEPALIVE_SECONDS = 15
+
+class Subscription:
+    def __init__(self, topics: set):
+        self.topics = topics
+        self.queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self.overflowed = False
+
+class ChangeHub:
+    def __init__(self, history_size: int = CHANGE_HISTORY_SIZE):
+        self.epoch = uuid.uuid4().hex[:8]
+        self.seq = 0
+        self.history = deque(maxlen=history_size)
+        self.subscribers = set()
+
+    def _event_id(self, seq: int) -> str:
+        return f'{self.epoch}:{seq}'
+
+    def publish(self, topic: str, event_type: str, data: dict):
+        self.seq += 1
+        event = {
+            'id': self._event_id(self.seq),
+            'seq': self.seq,
+            'topic': topic,
+            'type': event_type,
+            'data': jsonable_encoder(data)
+        }
+        self.history.append(event)
+        for sub in list(self.subscribers):
+            if topic not in sub.topics:
+                continue
+            try:
+                sub.queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # A client this far behind is cheaper to reset than to buffer
+                sub.overflowed = True
+                self.subscribers.discard(sub)
+
+    def _reset_event(self) -> dict:
+        return {'id': self._event_id(self.seq), 'seq': self.seq, 'topic': None, 'type': 'reset', 'data': None}
+
+    def _replay(self, topics: set, last_event_id: Optional[str]) -> Optional[list]:
+        if not last_event_id:
+            return []
+        epoch, _, seq = last_event_id.partition(':')
+        if epoch != self.epoch or not seq.isdigit():
+            return None
+        since = int(seq)
+        oldest = self.history[0]['seq'] if self.history else self.seq + 1
+        if since < oldest - 1:
+            return None
+        return [event for event in self.history if event['seq'] > since and event['topic'] in topics]
+
+    async def listen(self, topics: set, last_event_id: Optional[str] = None):
+        """Yield replayed then live events for topics; yields None when idle for KEEPALIVE_SECONDS."""
+        sub = Subscription(topics)
+        self.subscribers.add(sub)
+        try:
+            backlog = self._replay(topics, last_event_id)
+            for event in backlog if backlog is not None else [self._reset_event()]:
+                yield event
+            while True:
+                if sub.overflowed and sub.queue.empty():
+                    yield self._reset_event()
+                    return
+                try:
+                    yield await asyncio.wait_for(sub.queue.get(), KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield None
+        finally:
+            self.subscribers.discard(sub)
+
+change_hub = ChangeHub()
+
+def parse_topics(topics: Optional[str]) -> set:
+    if not topics:
+        return set(CHANGE_TOPICS)
+    requested = {topic.strip() for topic in topics.split(',') if topic.strip()}
+    unknown = requested - set(CHANGE_TOPICS)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown topics: {', '.join(sorted(unknown))}")
+    return requested
+
+def equipment_delta(equipment: dict) -> dict:
+    return {field: equipment.get(field) for field in ('id', 'name', 'status', 'issued_to', 'due_at')}
+
+# ============ EQUIPMENT RESERVATIONS ============
+# Demand for an item is absorbed by a FIFO waitlist and a grid of fixed-length
+# time slots (one equipment_slots document per booked slot, unique on
+# (equipment_id, slot_start), so overlapping reservations cannot both insert).
+# Whenever an item comes back it is handed straight to the current slot holder
+# or the head of the waitlist; a background sweep expires overdue loans and
+# starts slots that have begun.
+def slot_floor(moment: datetime) -> datetime:
+    moment = moment.astimezone(timezone.utc).replace(second=0, microsecond=0)
+    return moment - timedelta(minutes=moment.minute % SLOT_MINUTES)
+
+async def issue_equipment(equipment_id: str, email: str, due_at: datetime) -> Optional[dict]:
+    """Atomically issue an Available item; returns the updated document or None."""
+    now = datetime.now(timezone.utc)
+    equipment = await db.sports_equipment.find_one_and_update(
+        {'id': equipment_id, 'status': 'Available'},
+        {'$set': {
+            'status': 'Issued',
+            'issued_to': email,
+            'issued_at': now,
+            'due_at': due_at,
+            'updated_at': now
+        }},
+        projection={"_id": 0},
+        return_document=ReturnDocument.AFTER
+    )
+    if equipment:
+        response_cache.invalidate('equipment')
+        change_hub.publish('equipment', 'updated', equipment_delta(equipment))
+    return equipment
+
+async def loan_due_at(equipment_id: str, email: str, now: datetime, due_at: datetime) -> Optional[datetime]:
+    """Cut a loan short at the next slot someone else reserved; None if their slot is already running."""
+    slot = await db.equipment_slots.find_one(
+        {'equipment_id': equipment_id, 'email': {'$ne': email}, 'slot_start': {'$gte': slot_floor(now), '$lt': due_at}},
+        {"_id": 0, 'slot_start': 1},
+        sort=[('slot_start', ASCENDING)]
+    )
+    if not slot:
+        return due_at
+    return slot['slot_start'] if slot['slot_start'] > now else None
+
+async def assign_next_holder(equipment_id: str, now: Optional[datetime] = None) -> Optional[dict]:
+    """Give a just-returned item to the active slot holder, else the head of the waitlist."""
+    now = now or datetime.now(timezone.utc)
+    slot = await db.equipment_slots.find_one(
+        {'equipment_id': equipment_id, 'slot_start': slot_floor(now)}, {"_id": 0}
+    )
+    if slot:
+        return await issue_equipment(equipment_id, slot['email'], slot['reservation_end'])
+    
+    entry = await db.equipment_waitlist.find_one_and_update(
+        {'equipment_id': equipment_id, 'status': 'waiting'},
+        {'$set': {'status': 'assigned', 'assigned_at': now}},
+        sort=[('created_at', ASCENDING), ('id', ASCENDING)],
+        projection={"_id": 0}
+    )
+    if not entry:
+        return None
+    
+    due_at = await loan_due_at(equipment_id, entry['email'], now, now + ISSUE_PERIOD)
+    equipment = await issue_equipment(equipment_id, entry['email'], due_at) if due_at else None
+    if not equipment:
+        # Someone else got the item first; the entry keeps its place at the head
+        await db.equipment_waitlist.update_one({'id': entry['id']}, {'$set': {'status': 'waiting'}})
+    return equipment
+
+async def next_free_slot(equipment_id: str, slots: int, now: Optional[datetime] = None) -> Optional[datetime]:
+    start = slot_floor(now or datetime.now(timezone.utc))
+    horizon = start + RESERVATION_HORIZON
+    span = timedelta(minutes=SLOT_MINUTES * slots)
+    candidate = start
+    booked = db.equipment_slots.find(
+        {'equipment_id': equipment_id, 'slot_start': {'$gte': start, '$lt': horizon}},
+        {"_id": 0, 'slot_start': 1}
+    ).sort('slot_start', ASCENDING)
+    async for slot in booked:
+        taken = slot['slot_start']
+        if taken >= candidate + span:
+            break
+        candidate = max(candidate, taken + timedelta(minutes=SLOT_MINUTES))
+    return candidate if candidate + span <= horizon else None
+
+async def run_reservation_sweep(now: Optional[datetime] = None) -> dict:
+    now = now or datetime.now(timezone.utc)
+    expired = started = failed = 0
+    
+    overdue = db.sports_equipment.find(
+        {'status': 'Issued', 'due_at': {'$lt': now}}, {"_id": 0, 'id': 1, 'due_at': 1}
+    )
+    async for equipment in overdue:
+        released = await db.sports_equipment.find_one_and_update(
+            {'id': equipment['id'], 'status': 'Issued', 'due_at': equipment['due_at']},
+            {'$set': {
+                'status': 'Available', 'issued_to': None, 'issued_at': None, 'due_at': None,
+                'updated_at': datetime.now(timezone.utc)
+            }},
+            projection={"_id": 0},
+            return_document=ReturnDocument.AFTER
+        )
+        if released:
+            expired += 1
+            response_cache.invalidate('equipment')
+            change_hub.publish('equipment', 'updated', equipment_delta(released))
+            await assign_next_holder(equipment['id'], now)
+    
+    async for slot in db.equipment_slots.find({'slot_start': slot_floor(now)}, {"_id": 0}):
+        if await issue_equipment(slot['equipment_id'], slot['email'], slot['reservation_end']):
+            started += 1
+            continue
+        equipment = await db.sports_equipment.find_one({'id': slot['equipment_id']}, {"_id": 0, 'status': 1, 'issued_to': 1})
+        if equipment and equipment.get('issued_to') == slot['email']:
+            continue
+        # e.g. under maintenance, or an admin issued it past the slot; the holder needs to hear about it
+        failed += 1
+        logger.warning(
+            f"Reserved slot {slot['slot_start']} on equipment {slot['equipment_id']} for {slot['email']} "
+            f"could not start: item is {equipment['status'] if equipment else 'missing'}"
+        )
+    
+    return {'expired': expired, 'started': started, 'failed': failed}
+
+async def reservation_scheduler():
+    while True:
+        try:
+            await run_reservation_sweep()
+        except Exception:
+            logger.exception('Reservation sweep failed')
+        await asyncio.sleep(SCHEDULER_INTERVAL_SECONDS)
+
+# ============ COMPLAINT WORKFLOW ============
+# Each complaint gets an SLA deadline from its category, scaled by priority.
+# Open complaints also carry an internal escalate_at (not part of the API
+# model): the sweeper picks up everything whose escalate_at has passed, bumps
+# its priority one step and schedules the next escalation, up to
+# MAX_ESCALATIONS. Every transition is appended to complaint_events.
+COMPLAINT_SLA_HOURS = {'waste': 24, 'maintenance': 72, 'other': 120}
+COMPLAINT_PRIORITIES = ['low', 'normal', 'high', 'urgent']
+PRIORITY_SLA_FACTOR = {'low': 2.0, 'normal': 1.0, 'high': 0.5, 'urgent': 0.25}
+OPEN_COMPLAINT_STATUSES = ['Pending', 'In Progress']
+ESCALATION_INTERVAL = timedelta(hours=int(os.environ.get('ESCALATION_INTERVAL_HOURS', 24)))
+MAX_ESCALATIONS = 3
+ESCALATION_BATCH_SIZE = 500
+COMPLAINT_WORKFLOW_PROJECTION = {
+    '_id': 0, 'id': 1, 'status': 1, 'priority': 1, 'category': 1, 'assigned_to': 1,
+    'contact_email': 1, 'sla_due_at': 1, 'escalate_at': 1, 'escalation_level': 1,
+    'created_at': 1, 'updated_at': 1
+}
+
+def complaint_sla_due(category: str, priority: str, created_at: datetime) -> datetime:
+    return created_at + timedelta(hours=COMPLAINT_SLA_HOURS[category] * PRIORITY_SLA_FACTOR[priority])
+
+def complaint_document(complaint: Complaint) -> dict:
+    if complaint.sla_due_at is None:
+        complaint.sla_due_at = complaint_sla_due(complaint.category, complaint.priority, complaint.created_at)
+    doc = complaint.model_dump(exclude={'imageBase64', 'image_url', 'thumbnail_url'})
+    doc.update(location_fields(complaint.location))
+    doc['match_tokens'] = match_tokens(complaint.title, complaint.description)
+    doc['escalate_at'] = doc['sla_due_at'] if complaint.status in OPEN_COMPLAINT_STATUSES else None
+    return doc
+
+def complaint_event_doc(complaint_id: str, actor: str, action: str, changes: dict, note: Optional[str] = None) -> dict:
+    return ComplaintEvent(complaint_id=complaint_id, actor=actor, action=action, changes=changes, note=note).model_dump()
+
+async def record_complaint_event(complaint_id: str, actor: str, action: str, changes: dict, note: Optional[str] = None):
+    await db.complaint_events.insert_one(complaint_event_doc(complaint_id, actor, action, changes, note))
+
+async def update_complaint(current: dict, changes: dict, actor: str, action: str, note: Optional[str] = None) -> dict:
+    """Apply changes guarded on the updated_at that was read, log the transition and return the new state."""
+    changes = {**changes, 'updated_at': datetime.now(timezone.utc)}
+    result = await db.complaints.update_one(
+        {'id': current['id'], 'updated_at': current['updated_at']},
+        {'$set': changes}
+    )
+    if result.matched_count == 0:
+        raise HTTPException(status_code=409, detail='Complaint was modified concurrently, please retry')
+    logged = {field: [current.get(field), value] for field, value in changes.items()
+              if field in ('status', 'priority', 'assigned_to', 'escalation_level') and current.get(field) != value}
+    await record_complaint_event(current['id'], actor, action, logged, note)
+    response_cache.invalidate('complaints')
+    updated = {**current, **changes}
+    updated.pop('escalate_at', None)
+    change_hub.publish('complaints', 'updated', updated)
+    return updated
+
+async def run_complaint_sweep(now: Optional[datetime] = None) -> int:
+    now = now or datetime.now(timezone.utc)
+    escalated = 0
+    overdue = db.complaints.find(
+        {'status': {'$in': OPEN_COMPLAINT_STATUSES}, 'escalate_at': {'$lte': now}},
+        COMPLAINT_WORKFLOW_PROJECTION
+    ).sort('escalate_at', ASCENDING).limit(ESCALATION_BATCH_SIZE)
+    async for complaint in overdue:
+        level = complaint.get('escalation_level', 0) + 1
+        priority = COMPLAINT_PRIORITIES[min(COMPLAINT_PRIORITIES.index(complaint.get('priority', 'normal')) + 1,
+                                            len(COMPLAINT_PRIORITIES) - 1)]
+        changes = {
+            'priority': priority,
+            'escalation_level': level,
+            'escalate_at': now + ESCALATION_INTERVAL if level < MAX_ESCALATIONS else None
+        }
+        try:
+            await update_complaint(complaint, changes, 'system', 'escalated', f'SLA breached, escalation {level}')
+        except HTTPException:
+            continue  # changed under us; the next sweep sees the new state
+        escalated += 1
+        logger.warning(f"Complaint {complaint['id']} escalated to {priority} (level {level}), assigned to {complaint.get('assigned_to') or 'nobody'}")
+    return escalated
+
+async def complaint_escalator():
+    while True:
+        try:
+            await run_complaint_sweep()
+        except Exception:
+            logger.exception('Complaint escalation sweep failed')
+        await asyncio.sleep(SCHEDULER_INTERVAL_SECONDS)
+
+async def backfill_complaint_sla() -> int:
+    """Give complaints created before the workflow existed an SLA deadline and escalation schedule."""
+    updated = 0
+    pending = []
+    missing = db.complaints.find({'sla_due_at': None}, {'_id': 0, 'id': 1, 'category': 1, 'priority': 1, 'status': 1, 'created_at': 1})
+    async for doc in missing:
+        due = complaint_sla_due(doc['category'], doc.get('priority', 'normal'), doc['created_at'])
+        pending.append(UpdateOne({'id': doc['id']}, {'$set': {
+            'sla_due_at': due,
+            'priority': doc.get('priority', 'normal'),
+            'escalation_level': 0,
+            'escalate_at': due if doc['status'] in OPEN_COMPLAINT_STATUSES else None,
+            'updated_at': datetime.now(timezone.utc)
+        }}))
+        if len(pending) >= BULK_CHUNK_SIZE:
+            updated += (await db.complaints.bulk_write(pending, ordered=False)).modified_count
+            pending = []
+    if pending:
+        updated += (await db.complaints.bulk_write(pending, ordered=False)).modified_count
+    if updated:
+        response_cache.invalidate('complaints')
+    return updated
+
+# ============ ARCHIVE ============
+# Resolved complaints and lost & found items older than a cutoff are copied to
+# the archive store in batches and then deleted from the hot collections, so
+# those stay close to the open working set. Complaints take their status
+# history with them. Index-only derived fields are dropped on the way out.
+# Reads check the hot collection first and fall back to the archive.
+ARCHIVE_BATCH_SIZE = 1000
+ARCHIVE_INTERVAL_SECONDS = 3600
+ARCHIVE_DROP_FIELDS = ('search_prefixes', 'name_prefixes', 'match_tokens', 'geo', 'escalate_at', 'imageBase64')
+# kind -> (resolved filter, field used when resolved_at is missing on older documents)
+ARCHIVE_KINDS = {
+    'complaints': ({'status': 'Resolved'}, 'updated_at'),
+    'lost_found': ({'status': 'resolved'}, 'date'),
+}
+
+class CollectionArchive:
+    async def write(self, kind: str, docs: List[dict]):
+        await db[f'{kind}_archive'].bulk_write(
+            [ReplaceOne({'id': doc['id']}, doc, upsert=True) for doc in docs], ordered=False
+        )
+
+    async def find(self, kind: str, doc_id: str) -> Optional[dict]:
+        return await db[f'{kind}_archive'].find_one({'id': doc_id}, {'_id': 0})
+
+    async def scan(self, kind: str, start: datetime, end: datetime):
+        cursor = db[f'{kind}_archive'].find({'resolved_at': {'$gte': start, '$lt': end}}, {'_id': 0})
+        async for doc in cursor.sort('resolved_at', ASCENDING):
+            yield doc
+
+class SegmentArchive:
+    """Gzipped NDJSON segments on disk; archive_segments lists them and archived_ids says which segment holds each id."""
+    def __init__(self, root: Path):
+        self.root = root
+
+    def _write_segment(self, path: Path, docs: List[dict]):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with tempfile.NamedTemporaryFile(dir=path.parent, delete=False) as tmp:
+            with gzip.GzipFile(fileobj=tmp, mode='wb') as out:
+                for doc in docs:
+                    out.write(json.dumps(jsonable_encoder(doc), separators=(',', ':')).encode() + b'\n')
+        os.replace(tmp.name, path)
+
+    def _read_segment(self, path: Path) -> List[dict]:
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            return [json.loads(line) for line in f]
+
+    async def write(self, kind: str, docs: List[dict]):
+        segment = f"{kind}/{datetime.now(timezone.utc):%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}.ndjson.gz"
+        await asyncio.to_thread(self._write_segment, self.root / segment, docs)
+        keys = [doc['resolved_at'] for doc in docs]
+        await db.archive_segments.insert_one({
+            'kind': kind, 'segment': segment, 'count': len(docs),
+            'first': min(keys), 'last': max(keys), 'created_at': datetime.now(timezone.utc)
+        })
+        # A document archived twice (a retried batch) belongs to its newest segment
+        await db.archived_ids.bulk_write([
+            UpdateOne({'kind': kind, 'id': doc['id']}, {'$set': {'segment': segment}}, upsert=True)
+            for doc in docs
+        ], ordered=False)
+
+    async def find(self, kind: str, doc_id: str) -> Optional[dict]:
+        entry = await db.archived_ids.find_one({'kind': kind, 'id': doc_id}, {'_id': 0, 'segment': 1})
+        if not entry:
+            return None
+        for doc in await asyncio.to_thread(self._read_segment, self.root / entry['segment']):
+            if doc['id'] == doc_id:
+                return doc
+        return None
+
+    async def scan(self, kind: str, start: datetime, end: datetime):
+        segments = db.archive_segments.find(
+            {'kind': kind, 'first': {'$lt': end}, 'last': {'$gte': start}}, {'_id': 0}
+        ).sort('first', ASCENDING)
+        async for segment in segments:
+            current = {
+                entry['id'] async for entry in
+                db.archived_ids.find({'kind': kind, 'segment': segment['segment']}, {'_id': 0, 'id': 1})
+            }
+            for doc in await asyncio.to_thread(self._read_segment, self.root / segment['segment']):
+                # Segment files hold JSON, so dates come back as ISO strings
+                if doc['id'] in current and start <= datetime.fromisoformat(doc['resolved_at']) < end:
+                    yield doc
+
+archive_store = SegmentArchive(ARCHIVE_DIR) if ARCHIVE_BACKEND == 'segments' else CollectionArchive()
+
+async def find_archived(kind: str, doc_id: str) -> Optional[dict]:
+    return await archive_store.find(kind, doc_id)
+
+async def archive_resolved(older_than: timedelta, now: Optional[datetime] = None) -> dict:
+    now = now or datetime.now(timezone.utc)
+    cutoff = now - older_than
+    archived = {}
+    for kind, (resolved, fallback_field) in ARCHIVE_KINDS.items():
+        collection = db[kind]
+        query = {**resolved, '$or': [
+            {'resolved_at': {'$lt': cutoff}},
+            {'resolved_at': None, fallback_field: {'$lt': cutoff}}
+        ]}
+        archived[kind] = 0
+        while True:
+            docs = await collection.find(query, {'_id': 0}).limit(ARCHIVE_BATCH_SIZE).to_list(ARCHIVE_BATCH_SIZE)
+            if not docs:
+                break
+            ids = [doc['id'] for doc in docs]
+            history = {}
+            if kind == 'complaints':
+                async for event in db.complaint_events.find({'complaint_id': {'$in': ids}}, {'_id': 0}).sort('at', ASCENDING):
+                    history.setdefault(event['complaint_id'], []).append(event)
+            for doc in docs:
+                doc['resolved_at'] = doc.get('resolved_at') or doc[fallback_field]
+                doc['archived_at'] = now
+                for field in ARCHIVE_DROP_FIELDS:
+                    doc.pop(field, None)
+                if kind == 'complaints':
+                    doc['history'] = history.get(doc['id'], [])
+            # Write first, delete second: a crash in between leaves a copy in both places, never in neither
+            await archive_store.write(kind, docs)
+            result = await collection.delete_many({'id': {'$in': ids}, **resolved})
+            archived[kind] += result.deleted_count
+            # Anything reopened since the read is still hot (and complaints keep their history)
+            still_hot = {doc['id'] async for doc in collection.find({'id': {'$in': ids}}, {'_id': 0, 'id': 1})}
+            removed = [doc_id for doc_id in ids if doc_id not in still_hot]
+            await record_tombstones(kind, removed)
+            if kind == 'complaints':
+                await db.complaint_events.delete_many({'complaint_id': {'$in': removed}})
+    if any(archived.values()):
+        for namespace in ('complaints', 'lost_found', 'hotspots'):
+            response_cache.invalidate(namespace)
+    return archived
+
+async def archiver():
+    while True:
+        try:
+            archived = await archive_resolved(timedelta(days=ARCHIVE_AFTER_DAYS))
+            if any(archived.values()):
+                logger.info(f'Archived {archived}')
+        except Exception:
+            logger.exception('Archiving resolved documents failed')
+        await asyncio.sleep(ARCHIVE_INTERVAL_SECONDS)
+
+# ============ DELTA SYNC ============
+# GET /api/sync returns what changed in the synced collections since an opaque
+# token, so repeat visits skip refetching whole lists. The token holds one
+# (updated_at, id) keyset position per collection plus one for sync_tombstones,
+# where removals are recorded. A caught-up position is rewound to SYNC_OVERLAP
+# ago: a write that committed late with an earlier updated_at is sent again
+# rather than missed, and clients apply changes by id so repeats are harmless.
+# Tombstones expire after SYNC_TOMBSTONE_RETENTION; an older token gets a full
+# resync flagged reset=true.
+SYNC_COLLECTIONS = {
+    'lost_found': LostFoundItem,
+    'complaints': Complaint,
+    'sports_equipment': SportsEquipment,
+}
+SYNC_PAGE_SIZE = 500
+SYNC_OVERLAP = timedelta(seconds=5)
+SYNC_TOMBSTONE_RETENTION = timedelta(days=30)
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+async def record_tombstones(collection_name: str, ids: List[str]):
+    if not ids:
+        return
+    now = datetime.now(timezone.utc)
+    await db.sync_tombstones.insert_many([
+        {'collection': collection_name, 'id': doc_id, 'removed_at': now, 'expires_at': now + SYNC_TOMBSTONE_RETENTION}
+        for doc_id in ids
+    ])
+
+def encode_sync_token(positions: dict) -> str:
+    # Millisecond ints keep the token short and are exact for BSON dates
+    return encode_cursor(*[
+        [(positions[name][0] - EPOCH) // timedelta(milliseconds=1), positions[name][1]]
+        for name in [*SYNC_COLLECTIONS, 'tombstones']
+    ])
+
+def decode_sync_token(token: str) -> dict:
+    names = [*SYNC_COLLECTIONS, 'tombstones']
+    values = decode_cursor(token, size=len(names))
+    if not all(isinstance(value, list) and len(value) == 2 and isinstance(value[0], int) and isinstance(value[1], str)
+               for value in values):
+        raise HTTPException(status_code=400, detail='Invalid sync token')
+    try:
+        return {name: (EPOCH + timedelta(milliseconds=ms), last_id) for name, (ms, last_id) in zip(names, values)}
+    except OverflowError:
+        raise HTTPException(status_code=400, detail='Invalid sync token')
+
+def advance_position(position: Optional[tuple], docs: List[dict], field: str, now: datetime) -> tuple:
+    if len(docs) == SYNC_PAGE_SIZE:
+        return (docs[-1][field], docs[-1]['id'])
+    rewound = (now - SYNC_OVERLAP, '')
+    last = (docs[-1][field], docs[-1]['id']) if docs else position
+    return min(last, rewound) if last else rewound
+
+async def sync_changes(token: Optional[str]) -> dict:
+    now = datetime.now(timezone.utc)
+    positions = decode_sync_token(token) if token else None
+    reset = positions is not None and positions['tombstones'][0] < now - SYNC_TOMBSTONE_RETENTION
+    if positions is None or reset:
+        # Full snapshot; removals before now don't concern a client starting from scratch
+        positions = {name: None for name in SYNC_COLLECTIONS}
+        positions['tombstones'] = (now - SYNC_OVERLAP, '')
+    
+    result = {}
+    has_more = False
+    for name, model in SYNC_COLLECTIONS.items():
+        reader = trusted_read(model)
+        position = positions[name]
+        query = keyset_after({}, 'updated_at', 1, *position) if position else {}
+        docs = await db[name].find(query, reader.projection).sort(
+            [('updated_at', ASCENDING), ('id', ASCENDING)]
+        ).limit(SYNC_PAGE_SIZE).to_list(SYNC_PAGE_SIZE)
+        note_documents_returned(len(docs))
+        has_more = has_more or len(docs) == SYNC_PAGE_SIZE
+        positions[name] = advance_position(position, docs, 'updated_at', now)
+        result[name] = {'changed': reader.rows(docs), 'removed': []}
+    
+    tombstones = await db.sync_tombstones.find(
+        keyset_after({}, 'removed_at', 1, *positions['tombstones']),
+        {'_id': 0, 'collection': 1, 'id': 1, 'removed_at': 1}
+    ).sort([('removed_at', ASCENDING), ('id', ASCENDING)]).limit(SYNC_PAGE_SIZE).to_list(SYNC_PAGE_SIZE)
+    has_more = has_more or len(tombstones) == SYNC_PAGE_SIZE
+    positions['tombstones'] = advance_position(positions['tombstones'], tombstones, 'removed_at', now)
+    for tombstone in tombstones:
+        result[tombstone['collection']]['removed'].append(tombstone['id'])
+    
+    return {**result, 'token': encode_sync_token(positions), 'has_more': has_more, 'reset': reset}
+
+# ============ EXPORTS ============
+# Admin reports stream straight from a Motor cursor: each batch of documents
+# becomes a block of CSV lines or one Parquet row group and is sent before the
+# next batch is read, so memory stays at one batch whatever the date range.
+# Columns are fixed per kind and blob/index fields (inline images, search
+# prefixes, geo) are never fetched. Parquet needs pyarrow, which is optional.
+# Every kind's (date, id) sort, with and without its status filter, is served
+# by an index in REQUIRED_INDEXES (scanned backwards where it is descending).
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - depends on deployment
+    pa = None
+
+EXPORT_BATCH_SIZE = 2000
+EXPORT_FORMATS = {'csv': 'text/csv; charset=utf-8', 'parquet': 'application/vnd.apache.parquet'}
+
+# kind -> (date field, allowed statuses, [(column, type)])
+EXPORT_KINDS = {
+    'complaints': ('created_at', ['Pending', 'In Progress', 'Resolved'], [
+        ('id', 'string'), ('title', 'string'), ('description', 'string'), ('category', 'string'),
+        ('location', 'string'), ('location_id', 'string'), ('building', 'string'), ('floor', 'int'),
+        ('contact_email', 'string'), ('status', 'string'), ('priority', 'string'), ('assigned_to', 'string'),
+        ('escalation_level', 'int'), ('sla_due_at', 'timestamp'), ('resolved_at', 'timestamp'),
+        ('duplicate_of', 'string'), ('image_hash', 'string'), ('created_at', 'timestamp'), ('updated_at', 'timestamp'),
+    ]),
+    'mess_feedback': ('timestamp', [], [
+        ('id', 'string'), ('email', 'string'), ('meal_type', 'string'), ('rating', 'int'),
+        ('comment', 'string'), ('timestamp', 'timestamp'),
+    ]),
+    'lost_found': ('date', ['active', 'resolved'], [
+        ('id', 'string'), ('type', 'string'), ('item_name', 'string'), ('description', 'string'),
+        ('location', 'string'), ('location_id', 'string'), ('building', 'string'), ('floor', 'int'),
+        ('contact_name', 'string'), ('contact_email', 'string'), ('status', 'string'), ('image_hash', 'string'),
+        ('date', 'timestamp'), ('resolved_at', 'timestamp'), ('updated_at', 'timestamp'),
+    ]),
+}
+
+def export_query(kind: str, start: Optional[datetime], end: Optional[datetime], status: Optional[str]) -> dict:
+    date_field, statuses, _ = EXPORT_KINDS[kind]
+    query = {}
+    if start or end:
+        query[date_field] = {**({'$gte': start} if start else {}), **({'$lt': end} if end else {})}
+    if status:
+        if not statuses:
+            raise HTTPException(status_code=400, detail=f'{kind} has no status to filter on')
+        if status not in statuses:
+            raise HTTPException(status_code=400, detail=f"status must be one of: {', '.join(statuses)}")
+        query['status'] = status
+    return query
+
+async def export_batches(kind: str, query: dict):
+    date_field, _, columns = EXPORT_KINDS[kind]
+    projection = {'_id': 0, **{column: 1 for column, _ in columns}}
+    cursor = db[kind].find(query, projection).sort([(date_field, ASCENDING), ('id', ASCENDING)]).batch_size(EXPORT_BATCH_SIZE)
+    batch = []
+    async for doc in cursor:
+        batch.append(doc)
+        if len(batch) >= EXPORT_BATCH_SIZE:
+            note_documents_returned(len(batch))
+            yield batch
+            batch = []
+    if batch:
+        note_documents_returned(len(batch))
+        yield batch
+
+def _csv_cell(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+async def export_csv(kind: str, query: dict):
+    columns = [column for column, _ in EXPORT_KINDS[kind][2]]
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    async for batch in export_batches(kind, query):
+        writer.writerows([_csv_cell(doc.get(column)) for column in columns] for doc in batch)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file for ParquetWriter that hands back what was written since the last drain."""
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        # Parquet footers record absolute offsets, so this must count every byte ever written
+        return self.position
+
+    def drain(self) -> bytes:
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+def parquet_schema(kind: str):
+    types = {'string': pa.string(), 'int': pa.int64(), 'timestamp': pa.timestamp('ms', tz='UTC')}
+    return pa.schema([(column, types[kind_type]) for column, kind_type in EXPORT_KINDS[kind][2]])
+
+async def export_parquet(kind: str, query: dict):
+    schema = parquet_schema(kind)
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema, compression='zstd')
+    try:
+        async for batch in export_batches(kind, query):
+            writer.write_table(pa.Table.from_pydict(
+                {column: [doc.get(column) for doc in batch] for column in schema.names}, schema=schema
+            ))
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
+
+def export_stream(kind: str, fmt: str, query: dict):
+    if fmt == 'parquet':
+        if pa is None:
+            raise HTTPException(status_code=501, detail='Parquet export needs pyarrow installed on the server')
+        return export_parquet(kind, query)
+    return export_csv(kind, query)
+
+# ============ BULK INGESTION ============
+# Rows are validated with the regular models in chunks and written with
+# unordered insert_many, so one bad row (or duplicate id) is reported by its
+# index without aborting the rest of the batch.
+BULK_CHUNK_SIZE = 1000
+MAX_BULK_ROWS = 10000
+MAX_REPORTED_ERRORS = 1000
+
+def describe_validation_error(error: ValidationError) -> str:
+    return '; '.join(f"{'.'.join(str(part) for part in e['loc']) or 'row'}: {e['msg']}" for e in error.errors())
+
+async def _equipment_doc(equipment: SportsEquipment) -> dict:
+    return equipment.model_dump()
+
+async def _complaint_doc(complaint: Complaint) -> dict:
+    if complaint.imageBase64:
+        complaint.image_hash = await store_upload_image(complaint.imageBase64)
+    return complaint_document(complaint)
+
+async def _feedback_doc(feedback: MessFeedback) -> dict:
+    return feedback.model_dump()
+
+async def _after_feedback_insert(feedbacks: List[MessFeedback]):
+    await record_mess_ratings([(fb.meal_type, fb.rating, fb.timestamp) for fb in feedbacks])
+    response_cache.invalidate('ratings')
+
+async def _after_equipment_insert(equipment: List[SportsEquipment]):
+    response_cache.invalidate('equipment')
+
+async def _after_complaint_insert(complaints: List[Complaint]):
+    await db.complaint_events.insert_many([
+        complaint_event_doc(complaint.id, complaint.contact_email, 'created', {'status': [None, complaint.status]})
+        for complaint in complaints
+    ])
+    response_cache.invalidate('complaints')
+
+# kind -> (collection name, model, document builder, hook run on the rows that were inserted)
+BULK_KINDS = {
+    'equipment': ('sports_equipment', SportsEquipment, _equipment_doc, _after_equipment_insert),
+    'complaints': ('complaints', Complaint, _complaint_doc, _after_complaint_insert),
+    'feedback': ('mess_feedback', MessFeedback, _feedback_doc, _after_feedback_insert),
+}
+
+async def bulk_ingest(kind: str, rows) -> dict:
+    """Validate and insert an iterable of row dicts; returns counts and per-row errors."""
+    collection_name, model, build_doc, after_insert = BULK_KINDS[kind]
+    collection = db[collection_name]
+    inserted = failed = 0
+    errors = []
+    
+    def fail(row_number: int, message: str):
+        nonlocal failed
+        failed += 1
+        if len(errors) < MAX_REPORTED_ERRORS:
+            errors.append({'row': row_number, 'error': message})
+    
+    rows = iter(rows)
+    offset = 0
+    while True:
+        chunk = list(itertools.islice(rows, BULK_CHUNK_SIZE))
+        if not chunk:
+            break
+        objects, docs, row_numbers = [], [], []
+        for row_number, row in enumerate(chunk, start=offset):
+            try:
+                obj = model.model_validate(row)
+                doc = await build_doc(obj)
+            except ValidationError as e:
+                fail(row_number, describe_validation_error(e))
+                continue
+            except HTTPException as e:
+                fail(row_number, e.detail)
+                continue
+            objects.append(obj)
+            docs.append(doc)
+            row_numbers.append(row_number)
+        offset += len(chunk)
+        if not docs:
+            continue
+        
+        rejected = set()
+        try:
+            await collection.insert_many(docs, ordered=False)
+        except BulkWriteError as e:
+            for write_error in e.details.get('writeErrors', []):
+                rejected.add(write_error['index'])
+                fail(row_numbers[write_error['index']], write_error.get('errmsg', 'write failed'))
+        written = [obj for index, obj in enumerate(objects) if index not in rejected]
+        inserted += len(written)
+        if written:
+            await after_insert(written)
+    
+    errors.sort(key=lambda error: error['row'])
+    return {'inserted': inserted, 'failed': failed, 'errors': errors}
+
+def read_import_rows(path: Path):
+    """Lazily yield row dicts from a .csv or .ndjson/.jsonl file; empty CSV cells fall back to model defaults."""
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        if path.suffix.lower() == '.csv':
+            for row in csv.DictReader(f):
+                yield {key: value for key, value in row.items() if value not in ('', None)}
+        else:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+# ============ FEEDBACK WRITE-BEHIND ============
+# With FEEDBACK_WRITE_BEHIND enabled, submissions are queued in memory and a
+# single flusher writes them with insert_many once FEEDBACK_BATCH_SIZE rows
+# are waiting or FEEDBACK_FLUSH_SECONDS have passed. A full queue pushes back
+# with 503 instead of growing. Shutdown drains the queue before closing Mongo.
+FEEDBACK_ENQUEUE_TIMEOUT = 1.0
+FEEDBACK_SHUTDOWN_ATTEMPTS = 3
+DUPLICATE_KEY_ERROR = 11000
+
+class FeedbackWriter:
+    def __init__(self, maxsize: int, batch_size: int, flush_seconds: float):
+        self.maxsize = maxsize
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.queue = None
+        self.task = None
+        self.batch = []
+        self.inflight = None
+        self.closing = None
+
+    def start(self):
+        self.queue = asyncio.Queue(maxsize=self.maxsize)
+        self.closing = asyncio.Event()
+        self.task = asyncio.create_task(self._run())
 
-class BookEquipmentRequest(BaseModel):
-    equipment_id: str
+    async def submit(self, feedback: MessFeedback):
+        try:
+            await asyncio.wait_for(self.queue.put(feedback), FEEDBACK_ENQUEUE_TIMEOUT)
+        except asyncio.TimeoutError:
+            raise HTTPException(status_code=503, detail='Feedback queue is full, please retry', headers={'Retry-After': '1'})
 
-class UpdateEquipmentStatusRequest(BaseModel):
-    status: Literal['Available', 'Issued', 'Under Maintenance']
-    issued_to: Optional[str] = None
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            # Collected on self so a shutdown mid-collection can still flush it
+            self.batch.append(await self.queue.get())
+            deadline = loop.time() + self.flush_seconds
+            while len(self.batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    self.batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            batch, self.batch = self.batch, []
+            self.inflight = asyncio.ensure_future(self._write(batch))
+            await asyncio.shield(self.inflight)
 
-# ============ LOST & FOUND MODELS ============
-class LostFoundItem(BaseModel):
-    model_config = ConfigDict(extra="ignore")
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
-    type: Literal['lost', 'found']
-    item_name: str
-    description: str
-    location: str
-    contact_email: str
-    contact_name: str
-    imageBase64: Optional[str] = None
-    mimeType: Optional[str] = None
-    date: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
-    status: Literal['active', 'resolved'] = 'active'
+    async def _insert(self, batch: List[MessFeedback]) -> tuple:
+        """Insert a batch; returns (rows to retry, rows now stored)."""
+        failed = set()
+        try:
+            await db.mess_feedback.insert_many([await _feedback_doc(fb) for fb in batch], ordered=False)
+        except BulkWriteError as e:
+            for write_error in e.details.get('writeErrors', []):
+                # A duplicate id means an earlier attempt stored the row, so it still counts as stored
+                if write_error.get('code') != DUPLICATE_KEY_ERROR:
+                    failed.add(write_error['index'])
+        return (
+            [fb for index, fb in enumerate(batch) if index in failed],
+            [fb for index, fb in enumerate(batch) if index not in failed]
+        )
 
-class LostFoundCreate(BaseModel):
-    type: Literal['lost', 'found']
-    item_name: str
-    description: str
-    location: str
-    contact_name: str
-    imageBase64: Optional[str] = None
-    mimeType: Optional[str] = None
+    async def _write(self, batch: List[MessFeedback], max_attempts: Optional[int] = None):
+        # Stored rows move to uncounted until their rollup increments land, so a
+        # rollup failure is retried on its own instead of being lost to the
+        # duplicate-key path on the next insert attempt
+        uncounted = []
+        attempt = 0
+        while batch or uncounted:
+            try:
+                if batch:
+                    batch, stored = await self._insert(batch)
+                    uncounted.extend(stored)
+                if uncounted:
+                    await _after_feedback_insert(uncounted)
+                    uncounted = []
+            except Exception:
+                logger.exception(f'Writing {len(batch)} queued feedback rows ({len(uncounted)} stored, not yet counted) failed')
+            if not batch and not uncounted:
+                return
+            attempt += 1
+            # An in-flight write started before shutdown gets the shutdown budget too
+            limit = max_attempts or (FEEDBACK_SHUTDOWN_ATTEMPTS if self.closing.is_set() else None)
+            if limit and attempt >= limit:
+                logger.error(f'Dropped {len(batch)} feedback rows and {len(uncounted)} rollup increments after {attempt} failed attempts')
+                return
+            try:
+                # Shutdown cuts the backoff short
+                await asyncio.wait_for(self.closing.wait(), min(2 ** attempt, 30))
+            except asyncio.TimeoutError:
+                pass
 
-# ============ COMPLAINT MODELS ============
-class Complaint(BaseModel):
-    model_config = ConfigDict(extra="ignore")
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
-    title: str
-    description: str
-    location: str
-    category: Literal['waste', 'maintenance', 'other']
-    contact_email: str
-    imageBase64: Optional[str] = None
-    mimeType: Optional[str] = None
-    status: Literal['Pending', 'In Progress', 'Resolved'] = 'Pending'
-    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
-    updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    async def close(self):
+        if self.task is None:
+            return
+        self.closing.set()
+        self.task.cancel()
+        try:
+            await self.task
+        except asyncio.CancelledError:
+            pass
+        if self.inflight and not self.inflight.done():
+            await self.inflight
+        remaining, self.batch = self.batch, []
+        while not self.queue.empty():
+            remaining.append(self.queue.get_nowait())
+        for start in range(0, len(remaining), self.batch_size):
+            await self._write(remaining[start:start + self.batch_size], max_attempts=FEEDBACK_SHUTDOWN_ATTEMPTS)
+        if remaining:
+            logger.info(f'Flushed {len(remaining)} queued feedback rows on shutdown')
+        self.task = None
 
-class ComplaintCreate(BaseModel):
-    title: str
-    description: str
-    location: str
-    category: Literal['waste', 'maintenance', 'other']
-    imageBase64: Optional[str] = None
-    mimeType: Optional[str] = None
+feedback_writer = FeedbackWriter(FEEDBACK_QUEUE_SIZE, FEEDBACK_BATCH_SIZE, FEEDBACK_FLUSH_SECONDS) if FEEDBACK_WRITE_BEHIND else None
 
-class ComplaintStatusUpdate(BaseModel):
-    status: Literal['Pending', 'In Progress', 'Resolved']
+# ============ SCHEMA MIGRATIONS ============
+# Migrations are applied in order and recorded by name in schema_migrations.
+# Each one works in _id order in batches and checkpoints its progress after
+# every batch, so an interrupted run resumes where it stopped. They are also
+# idempotent, so several workers starting the same migration is harmless.
+MIGRATION_BATCH_SIZE = 1000
 
-# ============ HELPER FUNCTIONS ============
-def verify_token(authorization: Optional[str]) -> dict:
-    if not authorization or not authorization.startswith('Bearer '):
-        raise HTTPException(status_code=401, detail='Invalid authorization header')
-    
-    token = authorization.split(' ')[1]
+# Every timestamp field, per collection, that older code wrote as an ISO string
+DATE_FIELDS = {
+    'mess_feedback': ['timestamp'],
+    'mess_menus': ['updated_at'],
+    'sports_equipment': ['issued_at', 'due_at'],
+    'equipment_waitlist': ['created_at', 'assigned_at'],
+    'equipment_slots': ['slot_start', 'reservation_end'],
+    'lost_found': ['date', 'resolved_at'],
+    'lost_found_matches': ['updated_at'],
+    'complaints': ['created_at', 'updated_at', 'sla_due_at', 'resolved_at', 'escalate_at'],
+    'complaint_events': ['at'],
+    'complaints_archive': ['created_at', 'updated_at', 'sla_due_at', 'resolved_at', 'archived_at'],
+    'lost_found_archive': ['date', 'resolved_at', 'archived_at'],
+    'archive_segments': ['first', 'last', 'created_at'],
+}
+
+def parse_timestamp(value):
+    """ISO string -> UTC-aware datetime; other values (and unparseable strings) pass through."""
+    if not isinstance(value, str):
+        return value
     try:
-        payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
-        return payload
-    except jwt.ExpiredSignatureError:
-        raise HTTPException(status_code=401, detail='Token expired')
-    except jwt.InvalidTokenError:
-        raise HTTPException(status_code=401, detail='Invalid token')
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        return value
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
 
-def verify_admin(authorization: Optional[str]) -> dict:
-    payload = verify_token(authorization)
-    if payload.get('role') != 'admin':
-        raise HTTPException(status_code=403, detail='Admin access required')
-    return payload
+async def migrate_string_dates(state: dict, checkpoint):
+    for collection_name, fields in DATE_FIELDS.items():
+        progress = state.setdefault(collection_name, {'last_id': None, 'converted': 0, 'done': False})
+        if progress['done']:
+            continue
+        collection = db[collection_name]
+        string_typed = {'$or': [{field: {'$type': 'string'}} for field in fields]}
+        while True:
+            query = dict(string_typed)
+            if progress['last_id'] is not None:
+                query['_id'] = {'$gt': progress['last_id']}
+            docs = await collection.find(query, {field: 1 for field in fields}).sort('_id', ASCENDING).limit(MIGRATION_BATCH_SIZE).to_list(MIGRATION_BATCH_SIZE)
+            if not docs:
+                break
+            await collection.bulk_write([
+                UpdateOne({'_id': doc['_id']}, {'$set': {
+                    field: parse_timestamp(doc[field]) for field in fields if isinstance(doc.get(field), str)
+                }})
+                for doc in docs
+            ], ordered=False)
+            progress['last_id'] = docs[-1]['_id']
+            progress['converted'] += len(docs)
+            await checkpoint()
+        progress['done'] = True
+        await checkpoint()
+        logger.info(f"Converted string timestamps on {progress['converted']} {collection_name} documents")
+
+# Where documents written before updated_at existed take it from, in order of preference
+UPDATED_AT_SOURCES = {
+    'lost_found': ['resolved_at', 'date'],
+    'sports_equipment': ['issued_at'],
+}
+
+async def backfill_updated_at(state: dict, checkpoint):
+    for collection_name, sources in UPDATED_AT_SOURCES.items():
+        progress = state.setdefault(collection_name, {'updated': 0, 'done': False})
+        if progress['done']:
+            continue
+        collection = db[collection_name]
+        while True:
+            # Filled documents drop out of the query, so each batch picks up where the last stopped
+            docs = await collection.find({'updated_at': None}, {source: 1 for source in sources}).limit(MIGRATION_BATCH_SIZE).to_list(MIGRATION_BATCH_SIZE)
+            if not docs:
+                break
+            now = datetime.now(timezone.utc)
+            await collection.bulk_write([
+                UpdateOne({'_id': doc['_id']}, {'$set': {
+                    'updated_at': next((doc[source] for source in sources if doc.get(source)), now)
+                }})
+                for doc in docs
+            ], ordered=False)
+            progress['updated'] += len(docs)
+            await checkpoint()
+        progress['done'] = True
+        await checkpoint()
+        logger.info(f"Backfilled updated_at on {progress['updated']} {collection_name} documents")
+
+MIGRATIONS = [
+    ('0001-bson-dates', migrate_string_dates),
+    ('0002-sync-updated-at', backfill_updated_at),
+]
+
+async def run_migrations() -> List[str]:
+    applied = []
+    for name, migrate in MIGRATIONS:
+        record = await db.schema_migrations.find_one({'name': name}, {'_id': 0})
+        if record and record['status'] == 'done':
+            continue
+        state = record['state'] if record else {}
+        await db.schema_migrations.update_one(
+            {'name': name},
+            {'$set': {'status': 'running', 'state': state}, '$setOnInsert': {'started_at': datetime.now(timezone.utc)}},
+            upsert=True
+        )
+        
+        async def checkpoint():
+            await db.schema_migrations.update_one({'name': name}, {'$set': {'state': state}})
+        
+        await migrate(state, checkpoint)
+        await db.schema_migrations.update_one(
+            {'name': name}, {'$set': {'status': 'done', 'finished_at': datetime.now(timezone.utc)}}
+        )
+        applied.append(name)
+        logger.info(f'Applied migration {name}')
+    return applied
+
+async def migration_runner():
+    try:
+        await run_migrations()
+    except Exception:
+        logger.exception('Schema migration failed; it resumes from its checkpoint on the next start')
+
+# ============ INDEXES ============
+# Every query shape the API issues is declared here. Sort indexes end in `id`
+# so keyset pagination on (sort_field, id) stays a pure index range scan.
+REQUIRED_INDEXES = {
+    'sports_equipment': [
+        IndexModel([('id', ASCENDING)], unique=True),
+        IndexModel([('updated_at', ASCENDING), ('id', ASCENDING)]),
+        IndexModel([('name', ASCENDING), ('id', ASCENDING)]),
+        IndexModel([('status', ASCENDING), ('due_at', ASCENDING)]),
+    ],
+    'equipment_waitlist': [
+        IndexModel([('id', ASCENDING)], unique=True),
+        IndexModel([('equipment_id', ASCENDING), ('status', ASCENDING), ('created_at', ASCENDING), ('id', ASCENDING)]),
+        IndexModel(
+            [('equipment_id', ASCENDING), ('email', ASCENDING)],
+            unique=True, partialFilterExpression={'status': 'waiting'}
+        ),
+    ],
+    'equipment_slots': [
+        IndexModel([('equipment_id', ASCENDING), ('slot_start', ASCENDING)], unique=True),
+        IndexModel([('slot_start', ASCENDING)]),
+        IndexModel([('reservation_id', ASCENDING)]),
+        IndexModel([('expires_at', ASCENDING)], expireAfterSeconds=0),
+    ],
+    'lost_found': [
+        IndexModel([('id', ASCENDING)], unique=True),
+        IndexModel([('updated_at', ASCENDING), ('id', ASCENDING)]),
+        # Unfiltered exports walk this in (date, id) order
+        IndexModel([('date', ASCENDING), ('id', ASCENDING)]),
+        IndexModel([('status', ASCENDING), ('date', DESCENDING), ('id', DESCENDING)]),
+        IndexModel([('type', ASCENDING), ('status', ASCENDING), ('date', DESCENDING), ('id', DESCENDING)]),
+        IndexModel([('status', ASCENDING), ('search_prefixes', ASCENDING)]),
+        IndexModel([('geo', GEOSPHERE), ('status', ASCENDING), ('type', ASCENDING)]),
+        IndexModel([('type', ASCENDING), ('status', ASCENDING), ('match_tokens', ASCENDING)]),
+        IndexModel([('status', ASCENDING), ('resolved_at', ASCENDING)]),
+        IndexModel([('date', DESCENDING), ('building', ASCENDING), ('type', ASCENDING), ('status', ASCENDING)]),
+    ],
+    'complaints': [
+        IndexModel([('id', ASCENDING)], unique=True),
+        IndexModel([('updated_at', ASCENDING), ('id', ASCENDING)]),
+        IndexModel([('created_at', DESCENDING), ('id', DESCENDING)]),
+        IndexModel([('status', ASCENDING), ('created_at', DESCENDING), ('id', DESCENDING)]),
+        # "my queue" and "breaching soon": equality on assignee/status, paged by SLA deadline
+        IndexModel([('assigned_to', ASCENDING), ('status', ASCENDING), ('sla_due_at', ASCENDING), ('id', ASCENDING)]),
+        IndexModel([('status', ASCENDING), ('sla_due_at', ASCENDING), ('id', ASCENDING)]),
+        IndexModel([('status', ASCENDING), ('escalate_at', ASCENDING)]),
+        # Covers the per-building hotspot aggregation over a date window
+        IndexModel([('created_at', DESCENDING), ('building', ASCENDING), ('category', ASCENDING), ('status', ASCENDING)]),
+        IndexModel([('category', ASCENDING), ('status', ASCENDING), ('match_tokens', ASCENDING)]),
+        IndexModel([('status', ASCENDING), ('resolved_at', ASCENDING)]),
+    ],
+    'lost_found_matches': [
+        IndexModel([('lost_id', ASCENDING), ('found_id', ASCENDING)], unique=True),
+        IndexModel([('found_id', ASCENDING), ('score', DESCENDING)]),
+        IndexModel([('expires_at', ASCENDING)], expireAfterSeconds=0),
+    ],
+    'sync_tombstones': [
+        IndexModel([('removed_at', ASCENDING), ('id', ASCENDING)]),
+        IndexModel([('expires_at', ASCENDING)], expireAfterSeconds=0),
+    ],
+    'complaints_archive': [
+        IndexModel([('id', ASCENDING)], unique=True),
+        IndexModel([('resolved_at', ASCENDING)]),
+    ],
+    'lost_found_archive': [
+        IndexModel([('id', ASCENDING)], unique=True),
+        IndexModel([('resolved_at', ASCENDING)]),
+    ],
+    'archive_segments': [
+        IndexModel([('kind', ASCENDING), ('first', ASCENDING)]),
+    ],
+    'archived_ids': [
+        IndexModel([('kind', ASCENDING), ('id', ASCENDING)], unique=True),
+        IndexModel([('kind', ASCENDING), ('segment', ASCENDING)]),
+    ],
+    'campus_locations': [
+        IndexModel([('id', ASCENDING)], unique=True),
+        IndexModel([('geo', GEOSPHERE)]),
+    ],
+    'complaint_events': [
+        IndexModel([('complaint_id', ASCENDING), ('at', ASCENDING)]),
+    ],
+    'mess_feedback': [
+        IndexModel([('id', ASCENDING)], unique=True),
+        IndexModel([('timestamp', ASCENDING), ('id', ASCENDING)]),
+        IndexModel([('email', ASCENDING), ('timestamp', DESCENDING)]),
+    ],
+    'mess_rating_rollups': [
+        IndexModel([('day', ASCENDING), ('meal_type', ASCENDING)], unique=True),
+    ],
+    'image_thumbnails': [
+        IndexModel([('image_hash', ASCENDING)], unique=True),
+    ],
+    'mess_menus': [
+        IndexModel([('date', ASCENDING)], unique=True),
+    ],
+    'schema_migrations': [
+        IndexModel([('name', ASCENDING)], unique=True),
+    ],
+    'revoked_tokens': [
+        IndexModel([('jti', ASCENDING)], unique=True),
+        IndexModel([('expires_at', ASCENDING)], expireAfterSeconds=0),
+    ],
+}
+
+def _index_signature(keys, unique) -> tuple:
+    # Servers may report 1.0 for 1; special index types ('2dsphere', 'text') stay strings
+    keys = tuple((field, direction if isinstance(direction, str) else int(direction)) for field, direction in keys)
+    return keys, bool(unique)
+
+async def index_drift() -> dict:
+    """Compare declared indexes with the live ones: {collection: {'missing': [...], 'extra': [...]}}."""
+    drift = {}
+    for collection_name, models in REQUIRED_INDEXES.items():
+        existing = {
+            _index_signature(info['key'], info.get('unique')): name
+            for name, info in (await db[collection_name].index_information()).items()
+            if name != '_id_'
+        }
+        declared = {
+            _index_signature(model.document['key'].items(), model.document.get('unique')): model
+            for model in models
+        }
+        missing = [model for signature, model in declared.items() if signature not in existing]
+        extra = [name for signature, name in existing.items() if signature not in declared]
+        if missing or extra:
+            drift[collection_name] = {'missing': missing, 'extra': extra}
+    return drift
+
+async def sync_indexes() -> dict:
+    """Create any missing declared indexes. Extra indexes are reported, never dropped."""
+    drift = await index_drift()
+    for collection_name, report in drift.items():
+        if report['missing']:
+            try:
+                await db[collection_name].create_indexes(report['missing'])
+            except OperationFailure as e:
+                logger.error(f'Could not create indexes on {collection_name}: {e}')
+                continue
+            logger.info(f"Created {len(report['missing'])} index(es) on {collection_name}")
+        if report['extra']:
+            logger.warning(f"Undeclared indexes on {collection_name}: {', '.join(report['extra'])}")
+    return drift
 
 # ============ AUTH ROUTES ============
 @api_router.post("/auth/login", response_model=LoginResponse)
@@ -175,31 +2951,62 @@ async def login(request: LoginRequest):
         'name': name,
         'exp': datetime.now(timezone.utc) + timedelta(days=7)
     }
-    token = jwt.encode(payload, JWT_SECRET, algorithm=JWT_ALGORITHM)
+    token = issue_token(payload)
     
     return LoginResponse(token=token, email=email, role=role, name=name)
 
+@api_router.post("/auth/logout")
+async def logout(user: dict = Depends(get_current_user)):
+    await revoke_token(user)
+    return {'message': 'Logged out successfully'}
+
 # ============ MESS ROUTES ============
 @api_router.get("/mess/menu", response_model=MessMenu)
-async def get_mess_menu():
-    # Return today's menu
-    today = datetime.now(timezone.utc).strftime('%Y-%m-%d')
-    
-    # Static demo menu (in production, this would be from database)
-    menu = MessMenu(
-        date=today,
-        breakfast=['Idli Sambhar', 'Vada', 'Chutney', 'Tea/Coffee'],
-        lunch=['Rajma Chawal', 'Roti', 'Salad', 'Curd'],
-        snacks=['Samosa', 'Tea', 'Biscuits'],
-        dinner=['Paneer Butter Masala', 'Roti', 'Dal', 'Rice', 'Salad']
-    )
+async def get_mess_menu(date: Optional[str] = None, if_none_match: Optional[str] = Header(None)):
+    # Today's menu (UTC) unless a date is given
+    day = parse_day(date) if date else datetime.now(timezone.utc).strftime('%Y-%m-%d')
     
-    return menu
+    entry = await menu_store.payload(day)
+    headers = {'ETag': entry.etag, 'Cache-Control': 'no-cache'}
+    if etag_matches(if_none_match, entry.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=entry.body, media_type='application/json', headers=headers)
 
-@api_router.post("/mess/feedback")
-async def submit_mess_feedback(feedback: MessFeedbackCreate, authorization: str = Header(None)):
-    user = verify_token(authorization)
+@api_router.get("/mess/menu/range", response_model=List[MessMenu])
+async def get_mess_menu_range(start: str, end: str):
+    start, end = parse_day(start, 'start'), parse_day(end, 'end')
+    if end < start:
+        raise HTTPException(status_code=400, detail='end must not be before start')
+    if len(day_range(start, end)) > MAX_MENU_RANGE_DAYS:
+        raise HTTPException(status_code=400, detail=f'Range is limited to {MAX_MENU_RANGE_DAYS} days')
     
+    return await menu_store.range(start, end)
+
+@api_router.post("/mess/menu/import")
+async def import_mess_menu(request: Request, admin: dict = Depends(get_current_admin)):
+    # Accepts {"menus": [...]}, a bare JSON list of menus, or text/csv
+    body = await request.body()
+    try:
+        if request.headers.get('content-type', '').startswith('text/csv'):
+            menus = parse_menu_csv(body.decode('utf-8-sig'))
+        else:
+            data = json.loads(body)
+            menus = MessMenuImport.model_validate({'menus': data} if isinstance(data, list) else data).menus
+    except (ValueError, KeyError) as e:
+        raise HTTPException(status_code=400, detail=f'Invalid menu import: {e}')
+    
+    if not menus:
+        raise HTTPException(status_code=400, detail='No menus to import')
+    if len(menus) > MAX_MENU_IMPORT_ROWS:
+        raise HTTPException(status_code=400, detail=f'Import is limited to {MAX_MENU_IMPORT_ROWS} days')
+    for menu in menus:
+        menu.date = parse_day(menu.date)
+    
+    count = await import_menus(menus)
+    return {'message': f'Imported menus for {len(menus)} days', 'changed': count}
+
+@api_router.post("/mess/feedback")
+async def submit_mess_feedback(feedback: MessFeedbackCreate, user: dict = Depends(get_current_user)):
     feedback_obj = MessFeedback(
         email=user['email'],
         meal_type=feedback.meal_type,
@@ -207,141 +3014,394 @@ async def submit_mess_feedback(feedback: MessFeedbackCreate, authorization: str
         comment=feedback.comment
     )
     
-    doc = feedback_obj.model_dump()
-    doc['timestamp'] = doc['timestamp'].isoformat()
+    if feedback_writer:
+        await feedback_writer.submit(feedback_obj)
+        return {'message': 'Feedback submitted successfully'}
     
-    await db.mess_feedback.insert_one(doc)
+    await db.mess_feedback.insert_one(feedback_obj.model_dump())
+    await record_mess_rating(feedback_obj.meal_type, feedback_obj.rating, feedback_obj.timestamp)
+    response_cache.invalidate('ratings')
     
     return {'message': 'Feedback submitted successfully'}
 
 @api_router.get("/mess/ratings")
-async def get_mess_ratings():
-    # Get today's ratings
-    today_start = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
-    
-    feedbacks = await db.mess_feedback.find({}, {"_id": 0}).to_list(1000)
+async def get_mess_ratings(date: Optional[str] = None, if_none_match: Optional[str] = Header(None)):
+    # All-time averages by default, or a single day's (YYYY-MM-DD, UTC) averages
+    day = ALL_TIME_BUCKET
+    if date:
+        try:
+            day = datetime.strptime(date, '%Y-%m-%d').strftime('%Y-%m-%d')
+        except ValueError:
+            raise HTTPException(status_code=400, detail='date must be in YYYY-MM-DD format')
     
-    # Calculate average ratings by meal type
-    ratings = {'breakfast': [], 'lunch': [], 'snacks': [], 'dinner': []}
+    async def build():
+        rollups = await db.mess_rating_rollups.find({'day': day}, {"_id": 0}).to_list(len(MEAL_TYPES))
+        
+        averages = {meal_type: 0 for meal_type in MEAL_TYPES}
+        for rollup in rollups:
+            if rollup.get('count'):
+                averages[rollup['meal_type']] = round(rollup['sum'] / rollup['count'], 1)
+        return averages
     
-    for fb in feedbacks:
-        if 'meal_type' in fb and 'rating' in fb:
-            ratings[fb['meal_type']].append(fb['rating'])
-    
-    averages = {}
-    for meal_type, rating_list in ratings.items():
-        if rating_list:
-            averages[meal_type] = round(sum(rating_list) / len(rating_list), 1)
-        else:
-            averages[meal_type] = 0
+    return await cached_response('ratings', day, build, if_none_match)
+
+@api_router.get("/mess/analytics")
+async def get_mess_analytics(
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    granularity: Literal['day', 'week'] = 'day',
+    if_none_match: Optional[str] = Header(None),
+    admin: dict = Depends(get_current_admin)
+):
+    # Defaults to the last 30 days (UTC)
+    today = datetime.now(timezone.utc)
+    end = parse_day(end, 'end') if end else today.strftime('%Y-%m-%d')
+    start = parse_day(start, 'start') if start else (today - timedelta(days=29)).strftime('%Y-%m-%d')
+    if end < start:
+        raise HTTPException(status_code=400, detail='end must not be before start')
+    if len(day_range(start, end)) > MAX_ANALYTICS_DAYS:
+        raise HTTPException(status_code=400, detail=f'Range is limited to {MAX_ANALYTICS_DAYS} days')
     
-    return averages
+    # Cached per window; not invalidated per feedback, the TTL bounds staleness
+    return await cached_response(
+        'analytics', f'{start}:{end}:{granularity}',
+        lambda: mess_analytics(start, end, granularity), if_none_match
+    )
 
 # ============ SPORTS ROUTES ============
-@api_router.get("/sports/equipment", response_model=List[SportsEquipment])
-async def get_sports_equipment():
-    equipment = await db.sports_equipment.find({}, {"_id": 0}).to_list(1000)
-    
-    # If empty, initialize with demo data
-    if not equipment:
-        demo_equipment = [
-            {'id': str(uuid.uuid4()), 'name': 'Badminton Racket #1', 'status': 'Available', 'issued_to': None, 'issued_at': None},
-            {'id': str(uuid.uuid4()), 'name': 'Badminton Racket #2', 'status': 'Available', 'issued_to': None, 'issued_at': None},
-            {'id': str(uuid.uuid4()), 'name': 'TT Bat #1', 'status': 'Available', 'issued_to': None, 'issued_at': None},
-            {'id': str(uuid.uuid4()), 'name': 'TT Bat #2', 'status': 'Issued', 'issued_to': 'student@iiitd.ac.in', 'issued_at': datetime.now(timezone.utc).isoformat()},
-            {'id': str(uuid.uuid4()), 'name': 'Football', 'status': 'Available', 'issued_to': None, 'issued_at': None},
-            {'id': str(uuid.uuid4()), 'name': 'Cricket Bat', 'status': 'Under Maintenance', 'issued_to': None, 'issued_at': None},
-            {'id': str(uuid.uuid4()), 'name': 'Tennis Racket', 'status': 'Available', 'issued_to': None, 'issued_at': None},
-        ]
-        await db.sports_equipment.insert_many(demo_equipment)
-        equipment = demo_equipment
+async def seed_demo_equipment():
+    demo_equipment = [
+        {'id': str(uuid.uuid4()), 'name': 'Badminton Racket #1', 'status': 'Available', 'issued_to': None, 'issued_at': None},
+        {'id': str(uuid.uuid4()), 'name': 'Badminton Racket #2', 'status': 'Available', 'issued_to': None, 'issued_at': None},
+        {'id': str(uuid.uuid4()), 'name': 'TT Bat #1', 'status': 'Available', 'issued_to': None, 'issued_at': None},
+        {'id': str(uuid.uuid4()), 'name': 'TT Bat #2', 'status': 'Issued', 'issued_to': 'student@iiitd.ac.in', 'issued_at': datetime.now(timezone.utc)},
+        {'id': str(uuid.uuid4()), 'name': 'Football', 'status': 'Available', 'issued_to': None, 'issued_at': None},
+        {'id': str(uuid.uuid4()), 'name': 'Cricket Bat', 'status': 'Under Maintenance', 'issued_to': None, 'issued_at': None},
+        {'id': str(uuid.uuid4()), 'name': 'Tennis Racket', 'status': 'Available', 'issued_to': None, 'issued_at': None},
+    ]
+    now = datetime.now(timezone.utc)
+    await db.sports_equipment.insert_many([{**doc, 'updated_at': now} for doc in demo_equipment])
+
+@api_router.get("/sports/equipment", response_model=Union[List[SportsEquipment], Page[SportsEquipment]])
+async def get_sports_equipment(
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    stream: bool = False,
+    if_none_match: Optional[str] = Header(None)
+):
+    async def seed_if_empty():
+        # If empty, initialize with demo data
+        if cursor is None and not await db.sports_equipment.find_one({}, {"_id": 1}):
+            await seed_demo_equipment()
     
-    # Convert ISO timestamps back to datetime if needed
-    for eq in equipment:
-        if eq.get('issued_at') and isinstance(eq['issued_at'], str):
-            eq['issued_at'] = datetime.fromisoformat(eq['issued_at'])
+    # The full list (no paging/streaming) is the hot path and is served from cache
+    if limit is None and cursor is None and not stream:
+        async def build():
+            await seed_if_empty()
+            return await list_payload(db.sports_equipment, {}, 'name', 1, SportsEquipment)
+        return await cached_response('equipment', '', build, if_none_match)
     
-    return equipment
+    await seed_if_empty()
+    return await list_documents(
+        db.sports_equipment, {}, 'name', 1, SportsEquipment,
+        limit=limit, cursor=cursor, stream=stream
+    )
 
 @api_router.post("/sports/book")
-async def book_equipment(request: BookEquipmentRequest, authorization: str = Header(None)):
-    user = verify_token(authorization)
-    
-    equipment = await db.sports_equipment.find_one({'id': request.equipment_id}, {"_id": 0})
+async def book_equipment(request: BookEquipmentRequest, user: dict = Depends(get_current_user)):
+    now = datetime.now(timezone.utc)
+    # Walk-up loans end where someone's reserved slot begins
+    due_at = await loan_due_at(request.equipment_id, user['email'], now, now + ISSUE_PERIOD)
+    if due_at is None:
+        raise HTTPException(status_code=409, detail='Equipment is reserved for the current slot')
+    # Check-and-set in one atomic update so concurrent bookings get exactly one winner
+    equipment = await issue_equipment(request.equipment_id, user['email'], due_at)
     if not equipment:
-        raise HTTPException(status_code=404, detail='Equipment not found')
-    
-    if equipment['status'] != 'Available':
+        # Only the losing path pays for a second lookup to pick the right error
+        if not await db.sports_equipment.find_one({'id': request.equipment_id}, {"_id": 1}):
+            raise HTTPException(status_code=404, detail='Equipment not found')
         raise HTTPException(status_code=400, detail='Equipment not available')
     
-    # Update status
-    await db.sports_equipment.update_one(
-        {'id': request.equipment_id},
-        {'$set': {
-            'status': 'Issued',
-            'issued_to': user['email'],
-            'issued_at': datetime.now(timezone.utc).isoformat()
-        }}
-    )
-    
-    return {'message': 'Equipment booked successfully'}
+    return {'message': 'Equipment booked successfully', 'equipment': SportsEquipment(**equipment)}
 
 @api_router.put("/sports/equipment/{equipment_id}/status")
 async def update_equipment_status(
     equipment_id: str,
     request: UpdateEquipmentStatusRequest,
-    authorization: str = Header(None)
+    admin: dict = Depends(get_current_admin)
 ):
-    verify_admin(authorization)
-    
-    equipment = await db.sports_equipment.find_one({'id': equipment_id}, {"_id": 0})
-    if not equipment:
-        raise HTTPException(status_code=404, detail='Equipment not found')
-    
-    update_data = {'status': request.status}
+    update_data = {'status': request.status, 'updated_at': datetime.now(timezone.utc)}
     
     if request.status == 'Available':
         update_data['issued_to'] = None
         update_data['issued_at'] = None
+        update_data['due_at'] = None
     elif request.status == 'Issued' and request.issued_to:
+        now = datetime.now(timezone.utc)
         update_data['issued_to'] = request.issued_to
-        update_data['issued_at'] = datetime.now(timezone.utc).isoformat()
+        update_data['issued_at'] = now
+        update_data['due_at'] = now + ISSUE_PERIOD
     
-    await db.sports_equipment.update_one(
+    equipment = await db.sports_equipment.find_one_and_update(
         {'id': equipment_id},
-        {'$set': update_data}
+        {'$set': update_data},
+        projection={"_id": 0},
+        return_document=ReturnDocument.AFTER
+    )
+    if not equipment:
+        raise HTTPException(status_code=404, detail='Equipment not found')
+    response_cache.invalidate('equipment')
+    change_hub.publish('equipment', 'updated', equipment_delta(equipment))
+    
+    # A returned item goes straight to whoever is queued for it
+    if request.status == 'Available':
+        equipment = await assign_next_holder(equipment_id) or equipment
+    
+    return {'message': 'Equipment status updated successfully', 'equipment': SportsEquipment(**equipment)}
+
+@api_router.post("/sports/equipment/bulk")
+async def bulk_create_equipment(rows: List[dict], admin: dict = Depends(get_current_admin)):
+    if len(rows) > MAX_BULK_ROWS:
+        raise HTTPException(status_code=413, detail=f'At most {MAX_BULK_ROWS} rows per request')
+    return await bulk_ingest('equipment', rows)
+
+# ============ RESERVATION ROUTES ============
+@api_router.post("/sports/equipment/{equipment_id}/waitlist")
+async def join_waitlist(equipment_id: str, user: dict = Depends(get_current_user)):
+    equipment = await db.sports_equipment.find_one({'id': equipment_id}, {"_id": 0, 'status': 1, 'issued_to': 1})
+    if not equipment:
+        raise HTTPException(status_code=404, detail='Equipment not found')
+    if equipment.get('issued_to') == user['email']:
+        raise HTTPException(status_code=400, detail='Equipment is already issued to you')
+    
+    entry = WaitlistEntry(equipment_id=equipment_id, email=user['email'])
+    doc = entry.model_dump()
+    
+    # Upsert keyed on (item, student, waiting) so double-taps never queue twice
+    await db.equipment_waitlist.update_one(
+        {'equipment_id': equipment_id, 'email': user['email'], 'status': 'waiting'},
+        {'$setOnInsert': doc},
+        upsert=True
+    )
+    
+    # The item may have been free all along; hand it over if we are first in line
+    if equipment['status'] == 'Available':
+        await assign_next_holder(equipment_id)
+    
+    return await get_waitlist_position(equipment_id, user)
+
+@api_router.delete("/sports/equipment/{equipment_id}/waitlist")
+async def leave_waitlist(equipment_id: str, user: dict = Depends(get_current_user)):
+    result = await db.equipment_waitlist.update_one(
+        {'equipment_id': equipment_id, 'email': user['email'], 'status': 'waiting'},
+        {'$set': {'status': 'cancelled'}}
     )
+    if not result.modified_count:
+        raise HTTPException(status_code=404, detail='Not on the waitlist')
     
-    return {'message': 'Equipment status updated successfully'}
+    return {'message': 'Left the waitlist'}
+
+@api_router.get("/sports/equipment/{equipment_id}/waitlist")
+async def get_waitlist_position(equipment_id: str, user: dict = Depends(get_current_user)):
+    waiting = {'equipment_id': equipment_id, 'status': 'waiting'}
+    length = await db.equipment_waitlist.count_documents(waiting)
+    mine = await db.equipment_waitlist.find_one({**waiting, 'email': user['email']}, {"_id": 0})
+    position = None
+    if mine:
+        position = await db.equipment_waitlist.count_documents(
+            {**waiting, 'created_at': {'$lt': mine['created_at']}}
+        ) + 1
+    
+    equipment = await db.sports_equipment.find_one({'id': equipment_id}, {"_id": 0, 'issued_to': 1})
+    issued_to_you = bool(equipment) and equipment.get('issued_to') == user['email']
+    
+    return {'waitlist_length': length, 'position': position, 'issued_to_you': issued_to_you}
+
+@api_router.get("/sports/equipment/{equipment_id}/next-slot")
+async def get_next_slot(equipment_id: str, slots: int = Query(1, ge=1, le=MAX_SLOTS_PER_RESERVATION)):
+    slot_start = await next_free_slot(equipment_id, slots)
+    if not slot_start:
+        return {'slot_start': None, 'slot_end': None}
+    
+    return {
+        'slot_start': slot_start,
+        'slot_end': slot_start + timedelta(minutes=SLOT_MINUTES * slots)
+    }
+
+@api_router.post("/sports/equipment/{equipment_id}/reservations")
+async def reserve_slot(equipment_id: str, request: SlotReservationRequest, user: dict = Depends(get_current_user)):
+    if request.slot_start.tzinfo is None:
+        raise HTTPException(status_code=400, detail='slot_start must include a timezone')
+    slot_start = request.slot_start.astimezone(timezone.utc)
+    if slot_start != slot_floor(slot_start):
+        raise HTTPException(status_code=400, detail=f'slot_start must be aligned to {SLOT_MINUTES} minutes')
+    now_slot = slot_floor(datetime.now(timezone.utc))
+    if slot_start < now_slot or slot_start >= now_slot + RESERVATION_HORIZON:
+        raise HTTPException(status_code=400, detail='slot_start is outside the reservation window')
+    
+    if not await db.sports_equipment.find_one({'id': equipment_id}, {"_id": 1}):
+        raise HTTPException(status_code=404, detail='Equipment not found')
+    
+    reservation_id = str(uuid.uuid4())
+    reservation_end = slot_start + timedelta(minutes=SLOT_MINUTES * request.slots)
+    slot_docs = [
+        {
+            'equipment_id': equipment_id,
+            'slot_start': slot_start + timedelta(minutes=SLOT_MINUTES * i),
+            'reservation_id': reservation_id,
+            'reservation_end': reservation_end,
+            'email': user['email'],
+            # Slots are only needed until the reservation ends; the TTL index removes them after
+            'expires_at': reservation_end + SLOT_RETENTION
+        }
+        for i in range(request.slots)
+    ]
+    try:
+        await db.equipment_slots.insert_many(slot_docs)
+    except BulkWriteError:
+        # The unique (equipment_id, slot_start) index rejected an overlap; undo our part
+        await db.equipment_slots.delete_many({'reservation_id': reservation_id})
+        raise HTTPException(status_code=409, detail='Slot already reserved')
+    
+    # A loan running into the reserved slot now ends when the slot starts; the sweep hands the item over
+    shortened = await db.sports_equipment.find_one_and_update(
+        {'id': equipment_id, 'status': 'Issued', 'issued_to': {'$ne': user['email']}, 'due_at': {'$gt': slot_start}},
+        {'$set': {'due_at': slot_start, 'updated_at': datetime.now(timezone.utc)}},
+        projection={"_id": 0},
+        return_document=ReturnDocument.AFTER
+    )
+    if shortened:
+        response_cache.invalidate('equipment')
+        change_hub.publish('equipment', 'updated', equipment_delta(shortened))
+    
+    if slot_start == now_slot:
+        await issue_equipment(equipment_id, user['email'], reservation_end)
+    
+    return {
+        'message': 'Slot reserved successfully',
+        'reservation_id': reservation_id,
+        'slot_start': slot_start,
+        'slot_end': reservation_end
+    }
+
+@api_router.delete("/sports/reservations/{reservation_id}")
+async def cancel_reservation(reservation_id: str, user: dict = Depends(get_current_user)):
+    result = await db.equipment_slots.delete_many({'reservation_id': reservation_id, 'email': user['email']})
+    if not result.deleted_count:
+        raise HTTPException(status_code=404, detail='Reservation not found')
+    
+    return {'message': 'Reservation cancelled'}
 
 # ============ LOST & FOUND ROUTES ============
-@api_router.get("/lost-found/items", response_model=List[LostFoundItem])
-async def get_lost_found_items(type: Optional[str] = None, search: Optional[str] = None):
+@api_router.get("/lost-found/items", response_model=Union[List[LostFoundItem], Page[LostFoundItem]])
+async def get_lost_found_items(
+    type: Optional[str] = None,
+    search: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    stream: bool = False
+):
     query = {'status': 'active'}
     
     if type and type in ['lost', 'found']:
         query['type'] = type
     
-    items = await db.lost_found.find(query, {"_id": 0}).to_list(1000)
-    
-    # Convert ISO timestamps
-    for item in items:
-        if isinstance(item.get('date'), str):
-            item['date'] = datetime.fromisoformat(item['date'])
-    
-    # Apply search filter
+    # Ranked by relevance when searching, otherwise newest first
     if search:
-        search_lower = search.lower()
-        items = [item for item in items if search_lower in item['item_name'].lower() or search_lower in item['description'].lower()]
+        return await search_lost_found(query, search, limit=limit, cursor=cursor, stream=stream)
+    
+    return await list_documents(
+        db.lost_found, query, 'date', -1, LostFoundItem,
+        limit=limit, cursor=cursor, stream=stream
+    )
+
+@api_router.get("/lost-found/nearby", response_model=List[NearbyLostFoundItem])
+async def get_nearby_lost_found_items(
+    location: Optional[str] = None,
+    lng: Optional[float] = Query(None, ge=-180, le=180),
+    lat: Optional[float] = Query(None, ge=-90, le=90),
+    radius_m: float = Query(300, gt=0, le=5000),
+    type: Optional[Literal['lost', 'found']] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    if_none_match: Optional[str] = Header(None)
+):
+    # Near a catalogue location (id or free text) or an explicit point, closest first
+    if lng is None or lat is None:
+        place = location_catalogue.resolve(location or '')
+        if not place or not place.coordinates:
+            raise HTTPException(status_code=400, detail='Give lng/lat or a known campus location')
+        lng, lat = place.coordinates
+    query = {'status': 'active'}
+    if type:
+        query['type'] = type
     
-    # Sort by date (newest first)
-    items.sort(key=lambda x: x['date'], reverse=True)
+    reader = trusted_read(NearbyLostFoundItem)
     
-    return items
+    async def build():
+        rows = await db.lost_found.aggregate([
+            {'$geoNear': {
+                'near': {'type': 'Point', 'coordinates': [lng, lat]},
+                'key': 'geo',
+                'distanceField': 'distance_m',
+                'maxDistance': radius_m,
+                'spherical': True,
+                'query': query
+            }},
+            {'$limit': limit},
+            {'$project': reader.projection}
+        ]).to_list(limit)
+        return reader.rows(rows)
+    return await cached_response('lost_found', f'nearby:{lng:.5f}:{lat:.5f}:{radius_m:g}:{type}:{limit}', build, if_none_match)
+
+@api_router.get("/lost-found/hotspots")
+async def get_lost_found_hotspots(
+    days: int = Query(30, ge=1, le=365),
+    admin: dict = Depends(get_current_admin),
+    if_none_match: Optional[str] = Header(None)
+):
+    # Lost and found reports per building over the last `days` days; open means still active
+    async def build():
+        since = datetime.now(timezone.utc) - timedelta(days=days)
+        return await location_hotspots(db.lost_found, 'date', since, 'type', ['active'])
+    return await cached_response('hotspots', f'lost_found:{days}', build, if_none_match)
+
+@api_router.get("/lost-found/items/{item_id}/matches", response_model=List[LostFoundMatch])
+async def get_lost_found_matches(item_id: str):
+    # Possible matches recorded when either item was posted, best first
+    item = await db.lost_found.find_one({'id': item_id}, {'_id': 0, 'type': 1})
+    if not item:
+        raise HTTPException(status_code=404, detail='Item not found')
+    own, other = ('lost_id', 'found_id') if item['type'] == 'lost' else ('found_id', 'lost_id')
+    matches = await db.lost_found_matches.find({own: item_id}, {'_id': 0}).sort('score', DESCENDING).to_list(MAX_MATCHES * 4)
+    counterparts = {
+        doc['id']: doc
+        async for doc in db.lost_found.find({'id': {'$in': [m[other] for m in matches]}, 'status': 'active'}, LOST_FOUND_PROJECTION)
+    }
+    return [
+        {'item': counterparts[m[other]], 'score': m['score'], 'signals': m['signals']}
+        for m in matches if m[other] in counterparts
+    ]
+
+@api_router.put("/lost-found/items/{item_id}/status")
+async def update_lost_found_status(item_id: str, request: LostFoundStatusUpdate, user: dict = Depends(get_current_user)):
+    item = await db.lost_found.find_one({'id': item_id}, {'_id': 0, 'contact_email': 1})
+    if not item:
+        raise HTTPException(status_code=404, detail='Item not found')
+    if user['role'] != 'admin' and item['contact_email'] != user['email']:
+        raise HTTPException(status_code=403, detail='Only the poster can update this item')
+    now = datetime.now(timezone.utc)
+    resolved_at = now if request.status == 'resolved' else None
+    await db.lost_found.update_one({'id': item_id}, {'$set': {'status': request.status, 'resolved_at': resolved_at, 'updated_at': now}})
+    response_cache.invalidate('lost_found')
+    change_hub.publish('lost_found', 'updated', {'id': item_id, 'status': request.status, 'resolved_at': resolved_at})
+    return {'message': 'Item status updated successfully'}
 
 @api_router.post("/lost-found/item")
-async def create_lost_found_item(item: LostFoundCreate, authorization: str = Header(None)):
-    user = verify_token(authorization)
+async def create_lost_found_item(
+    item: LostFoundCreate,
+    background_tasks: BackgroundTasks,
+    user: dict = Depends(get_current_user)
+):
     
     item_obj = LostFoundItem(
         type=item.type,
@@ -350,41 +3410,100 @@ async def create_lost_found_item(item: LostFoundCreate, authorization: str = Hea
         location=item.location,
         contact_email=user['email'],
         contact_name=item.contact_name,
-        imageBase64=item.imageBase64,
+        image_hash=await store_upload_image(item.imageBase64),
         mimeType=item.mimeType
     )
     
-    doc = item_obj.model_dump()
-    doc['date'] = doc['date'].isoformat()
+    doc = item_obj.model_dump(exclude={'imageBase64', 'image_url', 'thumbnail_url'})
+    doc.update(lost_found_search_fields(item.item_name, item.description, item.location))
+    doc.update(location_fields(item.location))
+    doc['match_tokens'] = match_tokens(item.item_name, item.description)
     
     await db.lost_found.insert_one(doc)
+    response_cache.invalidate('lost_found')
+    change_hub.publish('lost_found', 'created', item_obj.model_dump(exclude={'imageBase64'}))
+    background_tasks.add_task(process_new_report, db.lost_found, item_obj.id, item_obj.image_hash)
     
     return {'message': f'{item.type.capitalize()} item posted successfully', 'id': item_obj.id}
 
 # ============ COMPLAINT ROUTES ============
-@api_router.get("/complaints", response_model=List[Complaint])
-async def get_complaints(status: Optional[str] = None):
+@api_router.get("/complaints", response_model=Union[List[Complaint], Page[Complaint]])
+async def get_complaints(
+    status: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    stream: bool = False,
+    if_none_match: Optional[str] = Header(None)
+):
     query = {}
     if status and status in ['Pending', 'In Progress', 'Resolved']:
         query['status'] = status
     
-    complaints = await db.complaints.find(query, {"_id": 0}).to_list(1000)
-    
-    # Convert ISO timestamps
-    for complaint in complaints:
-        if isinstance(complaint.get('created_at'), str):
-            complaint['created_at'] = datetime.fromisoformat(complaint['created_at'])
-        if isinstance(complaint.get('updated_at'), str):
-            complaint['updated_at'] = datetime.fromisoformat(complaint['updated_at'])
-    
-    # Sort by created_at (newest first)
-    complaints.sort(key=lambda x: x['created_at'], reverse=True)
+    # The unfiltered full list is what every Complaints/Admin page load asks for
+    if not query and limit is None and cursor is None and not stream:
+        async def build():
+            return await list_payload(db.complaints, {}, 'created_at', -1, Complaint)
+        return await cached_response('complaints', '', build, if_none_match)
     
-    return complaints
+    # Newest first
+    return await list_documents(
+        db.complaints, query, 'created_at', -1, Complaint,
+        limit=limit, cursor=cursor, stream=stream
+    )
+
+@api_router.get("/complaints/queue", response_model=Page[Complaint])
+async def get_complaint_queue(
+    assignee: Optional[EmailStr] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    user: dict = Depends(get_current_user)
+):
+    # Open complaints assigned to the caller, most urgent deadline first; admins may pass another assignee
+    assignee = (assignee or user['email']).lower()
+    if user['role'] != 'admin' and assignee != user['email'].lower():
+        raise HTTPException(status_code=403, detail='Admin access required')
+    query = {'assigned_to': assignee, 'status': {'$in': OPEN_COMPLAINT_STATUSES}}
+    return await list_documents(
+        db.complaints, query, 'sla_due_at', 1, Complaint,
+        limit=limit or DEFAULT_PAGE_SIZE, cursor=cursor
+    )
+
+@api_router.get("/complaints/breaching", response_model=Page[Complaint])
+async def get_breaching_complaints(
+    within_hours: float = Query(24, ge=0, le=24 * 30),
+    unassigned: bool = False,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    admin: dict = Depends(get_current_admin)
+):
+    # Open complaints already past, or within within_hours of, their SLA deadline
+    horizon = datetime.now(timezone.utc) + timedelta(hours=within_hours)
+    query = {'status': {'$in': OPEN_COMPLAINT_STATUSES}, 'sla_due_at': {'$lte': horizon}}
+    if unassigned:
+        query['assigned_to'] = None
+    return await list_documents(
+        db.complaints, query, 'sla_due_at', 1, Complaint,
+        limit=limit or DEFAULT_PAGE_SIZE, cursor=cursor
+    )
+
+@api_router.get("/complaints/hotspots")
+async def get_complaint_hotspots(
+    days: int = Query(7, ge=1, le=365),
+    admin: dict = Depends(get_current_admin),
+    if_none_match: Optional[str] = Header(None)
+):
+    # Complaints per building over the last `days` days, busiest first
+    async def build():
+        since = datetime.now(timezone.utc) - timedelta(days=days)
+        return await location_hotspots(db.complaints, 'created_at', since, 'category', OPEN_COMPLAINT_STATUSES)
+    return await cached_response('hotspots', f'complaints:{days}', build, if_none_match)
 
 @api_router.post("/complaints")
-async def create_complaint(complaint: ComplaintCreate, authorization: str = Header(None)):
-    user = verify_token(authorization)
+async def create_complaint(
+    complaint: ComplaintCreate,
+    background_tasks: BackgroundTasks,
+    user: dict = Depends(get_current_user)
+):
     
     complaint_obj = Complaint(
         title=complaint.title,
@@ -392,43 +3511,252 @@ async def create_complaint(complaint: ComplaintCreate, authorization: str = Head
         location=complaint.location,
         category=complaint.category,
         contact_email=user['email'],
-        imageBase64=complaint.imageBase64,
+        image_hash=await store_upload_image(complaint.imageBase64),
         mimeType=complaint.mimeType
     )
     
-    doc = complaint_obj.model_dump()
-    doc['created_at'] = doc['created_at'].isoformat()
-    doc['updated_at'] = doc['updated_at'].isoformat()
+    doc = complaint_document(complaint_obj)
     
     await db.complaints.insert_one(doc)
+    await record_complaint_event(complaint_obj.id, user['email'], 'created', {'status': [None, complaint_obj.status]})
+    response_cache.invalidate('complaints')
+    change_hub.publish('complaints', 'created', complaint_obj.model_dump(exclude={'imageBase64'}))
+    background_tasks.add_task(process_new_report, db.complaints, complaint_obj.id, complaint_obj.image_hash)
     
     return {'message': 'Complaint submitted successfully', 'id': complaint_obj.id}
 
+@api_router.post("/complaints/bulk")
+async def bulk_create_complaints(rows: List[dict], admin: dict = Depends(get_current_admin)):
+    if len(rows) > MAX_BULK_ROWS:
+        raise HTTPException(status_code=413, detail=f'At most {MAX_BULK_ROWS} rows per request')
+    return await bulk_ingest('complaints', rows)
+
 @api_router.put("/complaints/{complaint_id}/status")
 async def update_complaint_status(
     complaint_id: str,
     request: ComplaintStatusUpdate,
-    authorization: str = Header(None)
+    admin: dict = Depends(get_current_admin)
 ):
-    verify_admin(authorization)
+    complaint = await db.complaints.find_one({'id': complaint_id}, COMPLAINT_WORKFLOW_PROJECTION)
+    if not complaint:
+        raise HTTPException(status_code=404, detail='Complaint not found')
     
-    complaint = await db.complaints.find_one({'id': complaint_id}, {"_id": 0})
+    changes = {'status': request.status}
+    if request.status == 'Resolved':
+        changes.update(resolved_at=datetime.now(timezone.utc), escalate_at=None)
+    elif complaint['status'] == 'Resolved':
+        # Reopened: the original deadline still applies, so an overdue complaint escalates on the next sweep
+        changes.update(resolved_at=None, escalate_at=complaint.get('sla_due_at'))
+    await update_complaint(complaint, changes, admin['email'], 'status', request.note)
+    
+    return {'message': 'Complaint status updated successfully'}
+
+@api_router.put("/complaints/{complaint_id}/assignment")
+async def update_complaint_assignment(
+    complaint_id: str,
+    request: ComplaintAssignment,
+    admin: dict = Depends(get_current_admin)
+):
+    complaint = await db.complaints.find_one({'id': complaint_id}, COMPLAINT_WORKFLOW_PROJECTION)
     if not complaint:
         raise HTTPException(status_code=404, detail='Complaint not found')
     
-    await db.complaints.update_one(
-        {'id': complaint_id},
-        {'$set': {
-            'status': request.status,
-            'updated_at': datetime.now(timezone.utc).isoformat()
-        }}
+    changes = {}
+    if 'assigned_to' in request.model_fields_set:
+        changes['assigned_to'] = request.assigned_to.lower() if request.assigned_to else None
+    if request.priority and request.priority != complaint.get('priority'):
+        sla_due_at = complaint_sla_due(complaint['category'], request.priority, complaint['created_at'])
+        changes.update(priority=request.priority, sla_due_at=sla_due_at)
+        # Only reschedule complaints the sweeper has not started escalating yet
+        if complaint['status'] in OPEN_COMPLAINT_STATUSES and not complaint.get('escalation_level'):
+            changes['escalate_at'] = sla_due_at
+    if not changes:
+        raise HTTPException(status_code=400, detail='Nothing to update')
+    
+    updated = await update_complaint(complaint, changes, admin['email'], 'assignment', request.note)
+    return {'message': 'Complaint assignment updated successfully', 'assigned_to': updated.get('assigned_to'), 'priority': updated.get('priority')}
+
+@api_router.get("/complaints/{complaint_id}/history", response_model=List[ComplaintEvent])
+async def get_complaint_history(complaint_id: str, user: dict = Depends(get_current_user)):
+    complaint = await db.complaints.find_one({'id': complaint_id}, {'_id': 0, 'contact_email': 1})
+    archived = None if complaint else await find_archived('complaints', complaint_id)
+    if not complaint and not archived:
+        raise HTTPException(status_code=404, detail='Complaint not found')
+    if user['role'] != 'admin' and (complaint or archived)['contact_email'] != user['email']:
+        raise HTTPException(status_code=403, detail='Not allowed to view this complaint')
+    if archived:
+        return archived['history']
+    return await db.complaint_events.find({'complaint_id': complaint_id}, {'_id': 0}).sort('at', ASCENDING).to_list(1000)
+
+# ============ ARCHIVE ROUTES ============
+@api_router.get("/archive/{kind}")
+async def stream_archive(
+    kind: Literal['complaints', 'lost_found'],
+    start: str,
+    end: str,
+    admin: dict = Depends(get_current_admin)
+):
+    # NDJSON of documents resolved in [start, end); dates are YYYY-MM-DD
+    start_at, end_at = (
+        datetime.strptime(parse_day(value, field), '%Y-%m-%d').replace(tzinfo=timezone.utc)
+        for value, field in ((start, 'start'), (end, 'end'))
     )
+    async def rows():
+        async for doc in archive_store.scan(kind, start_at, end_at):
+            yield json.dumps(jsonable_encoder(doc), separators=(',', ':')) + '\n'
+    return StreamingResponse(rows(), media_type='application/x-ndjson')
+
+@api_router.get("/archive/{kind}/{doc_id}")
+async def get_archived(kind: Literal['complaints', 'lost_found'], doc_id: str, admin: dict = Depends(get_current_admin)):
+    doc = await find_archived(kind, doc_id)
+    if not doc:
+        raise HTTPException(status_code=404, detail='Not found in the archive')
+    return doc
+
+# ============ SYNC ROUTES ============
+@api_router.get("/sync")
+async def get_sync(since: Optional[str] = None):
+    # Omit since for a full snapshot; pass back the returned token (again right away while has_more)
+    return TrustedJSONResponse(await sync_changes(since))
+
+# ============ EXPORT ROUTES ============
+@api_router.get("/export/{kind}")
+async def export_documents(
+    kind: Literal['complaints', 'mess_feedback', 'lost_found'],
+    format: Literal['csv', 'parquet'] = 'csv',
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    status: Optional[str] = None,
+    admin: dict = Depends(get_current_admin)
+):
+    # start is inclusive and end exclusive, both YYYY-MM-DD (UTC)
+    start_at, end_at = (
+        datetime.strptime(parse_day(value, field), '%Y-%m-%d').replace(tzinfo=timezone.utc) if value else None
+        for value, field in ((start, 'start'), (end, 'end'))
+    )
+    chunks = export_stream(kind, format, export_query(kind, start_at, end_at, status))
+    filename = '-'.join([kind, *(value for value in (start, end, status) if value)]).replace(' ', '_')
+    return StreamingResponse(
+        chunks,
+        media_type=EXPORT_FORMATS[format],
+        headers={'Content-Disposition': f'attachment; filename="{filename}.{format}"'}
+    )
+
+# ============ LOCATION ROUTES ============
+@api_router.get("/locations", response_model=List[CampusLocation])
+async def get_campus_locations():
+    return sorted(location_catalogue.locations.values(), key=lambda location: location.name)
+
+@api_router.put("/locations/{location_id}", response_model=CampusLocation)
+async def upsert_campus_location(location_id: str, location: CampusLocation, admin: dict = Depends(get_current_admin)):
+    if location.id != location_id:
+        raise HTTPException(status_code=400, detail='Location id does not match the URL')
+    await db.campus_locations.replace_one({'id': location_id}, location_doc(location), upsert=True)
+    await location_catalogue.load()
+    # Existing reports keep their old mapping until `python server.py normalize-locations`
+    return location
+
+# ============ IMAGE ROUTES ============
+@api_router.get("/images/{image_hash}")
+async def get_image(
+    image_hash: str,
+    range: Optional[str] = Header(None),
+    if_none_match: Optional[str] = Header(None)
+):
+    if not IMAGE_HASH_RE.match(image_hash):
+        raise HTTPException(status_code=404, detail='Image not found')
     
-    return {'message': 'Complaint status updated successfully'}
+    size = await image_store.size(image_hash)
+    if size is None:
+        raise HTTPException(status_code=404, detail='Image not found')
+    
+    # Content-addressed blobs never change, so the hash is a strong ETag
+    etag = f'"{image_hash}"'
+    headers = {
+        'ETag': etag,
+        'Cache-Control': 'public, max-age=31536000, immutable',
+        'Accept-Ranges': 'bytes'
+    }
+    if if_none_match and etag in [tag.strip() for tag in if_none_match.split(',')]:
+        return Response(status_code=304, headers=headers)
+    
+    media_type = sniff_image_mime(await image_store.read(image_hash, 0, 12))
+    start, end, status_code = 0, size - 1, 200
+    if range:
+        start, end = parse_range(range, size)
+        status_code = 206
+        headers['Content-Range'] = f'bytes {start}-{end}/{size}'
+    headers['Content-Length'] = str(end - start + 1)
+    
+    return StreamingResponse(
+        _image_chunks(image_hash, start, end),
+        status_code=status_code,
+        media_type=media_type,
+        headers=headers
+    )
+
+# ============ CACHE ROUTES ============
+@api_router.get("/cache/stats")
+async def get_cache_stats(admin: dict = Depends(get_current_admin)):
+    return response_cache.snapshot()
+
+# ============ METRICS ROUTES ============
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    return Response(content=metrics.render(), media_type='text/plain; version=0.0.4')
+
+# ============ CHANGE FEED ROUTES ============
+@api_router.get("/events")
+async def stream_events(
+    topics: Optional[str] = None,
+    since: Optional[str] = None,
+    last_event_id: Optional[str] = Header(None)
+):
+    # Browsers send Last-Event-ID on reconnect; ?since= serves the first connect
+    events = change_hub.listen(parse_topics(topics), last_event_id or since)
+    
+    async def sse_frames():
+        async for event in events:
+            if event is None:
+                yield ': keepalive\n\n'
+                continue
+            yield f"id: {event['id']}\nevent: {event['type']}\ndata: {json.dumps(event, separators=(',', ':'))}\n\n"
+    
+    return StreamingResponse(
+        sse_frames(),
+        media_type='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@api_router.websocket("/ws")
+async def websocket_events(websocket: WebSocket, topics: Optional[str] = None, since: Optional[str] = None):
+    try:
+        subscribed = parse_topics(topics)
+    except HTTPException as e:
+        await websocket.close(code=1008, reason=e.detail)
+        return
+    
+    await websocket.accept()
+    
+    async def pump():
+        async for event in change_hub.listen(subscribed, since):
+            await websocket.send_json(event if event is not None else {'type': 'ping'})
+    
+    # Watch the receive side so an idle client's disconnect frees its subscription immediately
+    sender = asyncio.create_task(pump())
+    try:
+        while (await websocket.receive())['type'] != 'websocket.disconnect':
+            pass
+    except WebSocketDisconnect:
+        pass
+    finally:
+        sender.cancel()
 
 # Include the router in the main app
 app.include_router(api_router)
 
+app.add_middleware(MetricsMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_credentials=True,
@@ -444,6 +3772,176 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+_background_tasks = set()
+
+@app.on_event("startup")
+async def ensure_indexes():
+    await sync_indexes()
+
+@app.on_event("startup")
+async def load_campus_locations():
+    await location_catalogue.load()
+
+@app.on_event("startup")
+async def start_background_tasks():
+    jobs = [migration_runner, reservation_scheduler, complaint_escalator, revocation_refresher, menu_refresher, location_refresher]
+    if ARCHIVE_AFTER_DAYS:
+        jobs.append(archiver)
+    for job in jobs:
+        _background_tasks.add(asyncio.create_task(job()))
+    if feedback_writer:
+        feedback_writer.start()
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
-    client.close()
\ No newline at end of file
+    for task in _background_tasks:
+        task.cancel()
+    # Accepted-but-queued feedback must reach Mongo before the client closes
+    if feedback_writer:
+        await feedback_writer.close()
+    if _thumbnail_pool is not None:
+        _thumbnail_pool.shutdown(wait=False, cancel_futures=True)
+    client.close()
+
+# ============ MAINTENANCE CLI ============
+# Usage (from backend/): python server.py <command>
+async def _run_backfill_rollups(args):
+    count = await backfill_mess_rating_rollups()
+    logger.info(f'Rebuilt {count} mess rating rollup documents')
+
+async def _run_migrate_images(args):
+    count = await migrate_inline_images()
+    logger.info(f'Moved {count} inline images into the {IMAGE_STORE_BACKEND} image store')
+
+async def _run_backfill_thumbnails(args):
+    count = await backfill_thumbnails()
+    logger.info(f'Processed thumbnails for {count} documents')
+
+async def _run_reindex_search(args):
+    count = await reindex_lost_found_search()
+    logger.info(f'Reindexed search fields for {count} lost & found items')
+
+async def _run_backfill_sla(args):
+    count = await backfill_complaint_sla()
+    logger.info(f'Set SLA deadlines on {count} complaints')
+
+async def _run_normalize_locations(args):
+    await location_catalogue.load()
+    count = await normalize_locations()
+    logger.info(f'Updated location fields on {count} documents')
+
+async def _run_match_reports(args):
+    counts = await rebuild_match_index()
+    logger.info(f"Indexed {counts['lost_found']} items and {counts['complaints']} complaints; "
+                f"{counts['matched']} lost/found matches, {counts['duplicates']} duplicate complaints")
+
+async def _run_archive(args):
+    archived = await archive_resolved(timedelta(days=args.older_than_days))
+    logger.info(f"Archived {archived['complaints']} complaints and {archived['lost_found']} lost & found items to the {ARCHIVE_BACKEND} archive")
+
+async def _run_export(args):
+    fmt = args.format or ('parquet' if args.output.suffix == '.parquet' else 'csv')
+    try:
+        start, end = (
+            datetime.strptime(parse_day(value, field), '%Y-%m-%d').replace(tzinfo=timezone.utc) if value else None
+            for value, field in ((args.start, 'start'), (args.end, 'end'))
+        )
+        chunks = export_stream(args.kind, fmt, export_query(args.kind, start, end, args.status))
+    except HTTPException as e:
+        raise SystemExit(e.detail)
+    started = time.perf_counter()
+    with args.output.open('wb') as f:
+        async for chunk in chunks:
+            f.write(chunk)
+    logger.info(f'Exported {args.kind} to {args.output} ({args.output.stat().st_size} bytes) in {time.perf_counter() - started:.2f}s')
+
+async def _run_migrate(args):
+    applied = await run_migrations()
+    logger.info(f"Applied migrations: {', '.join(applied) or 'none pending'}")
+
+async def _run_indexes(args):
+    if not args.check:
+        await sync_indexes()
+    drift = await index_drift()
+    for collection_name, report in drift.items():
+        for model in report['missing']:
+            print(f"{collection_name}: missing {model.document['name']}")
+        for name in report['extra']:
+            print(f'{collection_name}: undeclared {name}')
+    if not drift:
+        print('All declared indexes are present')
+    elif args.check:
+        raise SystemExit(1)
+
+async def _run_import(args):
+    await location_catalogue.load()
+    started = time.perf_counter()
+    try:
+        report = await bulk_ingest(args.kind, read_import_rows(Path(args.path)))
+    except json.JSONDecodeError as e:
+        raise SystemExit(f'{args.path}: invalid NDJSON ({e})')
+    elapsed = time.perf_counter() - started
+    for error in report['errors']:
+        print(f"row {error['row']}: {error['error']}")
+    rate = report['inserted'] / elapsed if elapsed else 0
+    logger.info(f"Imported {report['inserted']} {args.kind} rows ({report['failed']} failed) in {elapsed:.2f}s, {rate:.0f} docs/s")
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Campus Catalyst backend maintenance commands')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    backfill_parser = commands.add_parser('backfill-rollups', help='Rebuild mess rating rollups from mess_feedback')
+    backfill_parser.set_defaults(handler=_run_backfill_rollups)
+
+    migrate_images_parser = commands.add_parser('migrate-images', help='Move inline imageBase64 fields into the image store')
+    migrate_images_parser.set_defaults(handler=_run_migrate_images)
+
+    thumbnails_parser = commands.add_parser('backfill-thumbnails', help='Generate missing thumbnails for stored images')
+    thumbnails_parser.set_defaults(handler=_run_backfill_thumbnails)
+
+    reindex_parser = commands.add_parser('reindex-search', help='Rebuild lost & found search prefixes')
+    reindex_parser.set_defaults(handler=_run_reindex_search)
+
+    sla_parser = commands.add_parser('backfill-sla', help='Give older complaints SLA deadlines and escalation schedules')
+    sla_parser.set_defaults(handler=_run_backfill_sla)
+
+    locations_parser = commands.add_parser('normalize-locations', help='Re-match complaint and lost & found locations against the campus catalogue')
+    locations_parser.set_defaults(handler=_run_normalize_locations)
+
+    match_parser = commands.add_parser('match-reports', help='Rebuild match tokens, rematch lost items and flag duplicate complaints')
+    match_parser.set_defaults(handler=_run_match_reports)
+
+    archive_parser = commands.add_parser('archive', help='Move resolved complaints and lost & found items into the archive')
+    archive_parser.add_argument('--older-than-days', type=int, default=ARCHIVE_AFTER_DAYS or 90)
+    archive_parser.set_defaults(handler=_run_archive)
+
+    export_parser = commands.add_parser('export', help='Stream complaints, mess feedback or lost & found to CSV or Parquet')
+    export_parser.add_argument('kind', choices=sorted(EXPORT_KINDS))
+    export_parser.add_argument('output', type=Path, help='.csv or .parquet file to write')
+    export_parser.add_argument('--format', choices=sorted(EXPORT_FORMATS), help='Defaults to the output file extension')
+    export_parser.add_argument('--start', help='YYYY-MM-DD, inclusive')
+    export_parser.add_argument('--end', help='YYYY-MM-DD, exclusive')
+    export_parser.add_argument('--status')
+    export_parser.set_defaults(handler=_run_export)
+
+    migrate_parser = commands.add_parser('migrate', help='Apply pending schema migrations (resumable)')
+    migrate_parser.set_defaults(handler=_run_migrate)
+
+    indexes_parser = commands.add_parser('indexes', help='Create missing indexes and report drift')
+    indexes_parser.add_argument('--check', action='store_true', help='Only report drift; exit 1 if any')
+    indexes_parser.set_defaults(handler=_run_indexes)
+
+    import_parser = commands.add_parser('import', help='Bulk import rows from a CSV or NDJSON file')
+    import_parser.add_argument('kind', choices=sorted(BULK_KINDS))
+    import_parser.add_argument('path', help='.csv, or .ndjson/.jsonl with one object per line')
+    import_parser.set_defaults(handler=_run_import)
+
+    args = parser.parse_args()
+    try:
+        asyncio.run(args.handler(args))
+    finally:
+        if _thumbnail_pool is not None:
+            _thumbnail_pool.shutdown()
+        client.close()
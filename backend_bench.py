@@ -0,0 +1,394 @@
+#!/usr/bin/env python3
+
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+from pathlib import Path
+from datetime import datetime, timezone, timedelta
+
+import jwt
+import httpx
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+
+sys.path.insert(0, str(Path(__file__).parent / 'backend'))
+import server  # noqa: E402
+
+
+def time_per_call(fn, iterations):
+    """Return mean microseconds per call of fn over the given iterations"""
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def bench_auth(iterations):
+    """Per-request auth overhead: the original uncached jwt.decode vs the cached verify_token"""
+    payload = {
+        'email': 'bench.user@iiitd.ac.in',
+        'role': 'student',
+        'name': 'Bench User',
+        'exp': datetime.now(timezone.utc) + timedelta(days=7)
+    }
+    token = server.issue_token(payload)
+    header = f'Bearer {token}'
+    secret = server.JWT_KEYS[server.JWT_ACTIVE_KID]
+
+    before = time_per_call(lambda: jwt.decode(token, secret, algorithms=[server.JWT_ALGORITHM]), iterations)
+
+    server.token_cache.entries.clear()
+    server.verify_token(header)
+    after = time_per_call(lambda: server.verify_token(header), iterations)
+
+    return {
+        'benchmark': 'auth',
+        'iterations': iterations,
+        'uncached_us_per_request': round(before, 2),
+        'cached_us_per_request': round(after, 2),
+        'speedup': round(before / after, 1)
+    }
+
+
+# ============ SEED DATA ============
+STUDENT_EMAIL = 'bench.student@iiitd.ac.in'
+ADMIN_EMAIL = 'admin@iiitd.ac.in'
+LOCATIONS = ['Library', 'Academic Block', 'Old Academic Block', 'Mess', 'Sports Complex',
+             'Boys Hostel', 'Girls Hostel', 'Seminar Block', 'R&D Block', 'Parking Lot']
+ITEM_NAMES = ['wallet', 'water bottle', 'umbrella', 'laptop charger', 'id card', 'earphones',
+              'calculator', 'notebook', 'jacket', 'keys', 'spectacles', 'pen drive']
+COMPLAINT_TITLES = {
+    'waste': ['Overflowing dustbin', 'Garbage not collected', 'Littering near entrance'],
+    'maintenance': ['Broken chair', 'AC not working', 'Leaking tap', 'Projector flickering', 'Wi-Fi down'],
+    'other': ['Stray dogs', 'Noise after hours', 'Lights left on']
+}
+SEED_HISTORY_DAYS = 90
+
+
+def _past(rng, now):
+    return now - timedelta(seconds=rng.randrange(SEED_HISTORY_DAYS * 86400))
+
+
+def complaint_rows(count, rng, now):
+    for _ in range(count):
+        category = rng.choice(list(COMPLAINT_TITLES))
+        created_at = _past(rng, now)
+        yield {
+            'title': rng.choice(COMPLAINT_TITLES[category]),
+            'description': f'Reported near {rng.choice(LOCATIONS).lower()}, please look into it',
+            'location': rng.choice(LOCATIONS),
+            'category': category,
+            'contact_email': STUDENT_EMAIL if rng.random() < 0.01 else f'student{rng.randrange(5000)}@iiitd.ac.in',
+            'status': rng.choices(['Pending', 'In Progress', 'Resolved'], weights=[3, 2, 5])[0],
+            'created_at': created_at,
+            'updated_at': created_at
+        }
+
+
+def feedback_rows(count, rng, now):
+    for _ in range(count):
+        yield {
+            'email': f'student{rng.randrange(5000)}@iiitd.ac.in',
+            'meal_type': rng.choice(server.MEAL_TYPES),
+            'rating': rng.choices([1, 2, 3, 4, 5], weights=[1, 2, 4, 5, 3])[0],
+            'comment': '',
+            'timestamp': _past(rng, now)
+        }
+
+
+def lost_found_docs(count, rng, now):
+    for _ in range(count):
+        item_name = rng.choice(ITEM_NAMES)
+        location = rng.choice(LOCATIONS)
+        item = server.LostFoundItem(
+            type=rng.choice(['lost', 'found']),
+            item_name=item_name,
+            description=f'{rng.choice(["Black", "Blue", "Red", "Grey"])} {item_name} near the {location.lower()}',
+            location=location,
+            contact_email=f'student{rng.randrange(5000)}@iiitd.ac.in',
+            contact_name='Bench Student',
+            date=_past(rng, now),
+            status='resolved' if rng.random() < 0.3 else 'active'
+        )
+        doc = item.model_dump(exclude={'imageBase64', 'image_url', 'thumbnail_url'})
+        doc.update(server.lost_found_search_fields(item.item_name, item.description, item.location))
+        doc.update(server.location_fields(item.location))
+        doc['match_tokens'] = server.match_tokens(item.item_name, item.description)
+        yield doc
+
+
+async def seed(complaints, items, feedback, seed_value=0):
+    """Insert synthetic rows through the same builders the bulk import uses"""
+    rng = random.Random(seed_value)
+    now = datetime.now(timezone.utc)
+    await server.sync_indexes()
+    await server.location_catalogue.load()
+    started = time.perf_counter()
+    counts = {
+        'complaints': (await server.bulk_ingest('complaints', complaint_rows(complaints, rng, now)))['inserted'],
+        'feedback': (await server.bulk_ingest('feedback', feedback_rows(feedback, rng, now)))['inserted'],
+        'lost_found': 0
+    }
+    docs = lost_found_docs(items, rng, now)
+    while True:
+        chunk = [doc for _, doc in zip(range(server.BULK_CHUNK_SIZE), docs)]
+        if not chunk:
+            break
+        await server.db.lost_found.insert_many(chunk, ordered=False)
+        counts['lost_found'] += len(chunk)
+    return {'seeded': counts, 'seconds': round(time.perf_counter() - started, 2)}
+
+
+# ============ SERIALIZATION ============
+# (name, list route, model, stored documents); each route's legacy full list is the largest payload it serves
+def equipment_docs(count, rng, now):
+    for index in range(count):
+        issued = rng.random() < 0.4
+        yield server.SportsEquipment(
+            name=f'{rng.choice(["Badminton Racket", "TT Bat", "Football", "Cricket Bat"])} #{index}',
+            status='Issued' if issued else 'Available',
+            issued_to=f'student{rng.randrange(5000)}@iiitd.ac.in' if issued else None,
+            issued_at=_past(rng, now) if issued else None,
+            due_at=now + timedelta(days=1) if issued else None
+        ).model_dump()
+
+
+def complaint_docs(count, rng, now):
+    for row in complaint_rows(count, rng, now):
+        yield server.Complaint(**row, **server.location_fields(row['location'])).model_dump()
+
+
+SERIALIZE_ROUTES = [
+    ('equipment', '/api/sports/equipment', server.SportsEquipment, equipment_docs),
+    ('lost_found', '/api/lost-found/items', server.LostFoundItem, lost_found_docs),
+    ('complaints', '/api/complaints', server.Complaint, complaint_docs),
+]
+
+
+async def bench_serialize(rows, iterations, seed_value=0):
+    """CPU per 1000 rows: response_model validation + stdlib JSON vs trusted rows + orjson"""
+    rng = random.Random(seed_value)
+    now = datetime.now(timezone.utc)
+    results = {}
+    for name, path, model, make_docs in SERIALIZE_ROUTES:
+        # What the model projection leaves of each stored document
+        docs = [{key: value for key, value in doc.items() if key in model.model_fields}
+                for doc in make_docs(rows, rng, now)]
+        route = next(route for route in server.app.routes if getattr(route, 'path', None) == path)
+
+        async def before():
+            content = await serialize_response(field=route.response_field, response_content=docs)
+            return JSONResponse(content).body
+
+        async def after():
+            return server.TrustedJSONResponse(server.trusted_read(model).rows(docs)).body
+
+        timings = {}
+        for label, render in (('before', before), ('after', after)):
+            body = await render()
+            start = time.process_time()
+            for _ in range(iterations):
+                await render()
+            timings[label] = (time.process_time() - start) / iterations * 1e3 * 1000 / rows
+            timings[f'{label}_body'] = body
+        results[name] = {
+            'before_cpu_ms_per_1000_rows': round(timings['before'], 2),
+            'after_cpu_ms_per_1000_rows': round(timings['after'], 2),
+            'speedup': round(timings['before'] / timings['after'], 1),
+            'same_payload': json.loads(timings['before_body']) == json.loads(timings['after_body'])
+        }
+    return {'benchmark': 'serialize', 'rows': rows, 'iterations': iterations, 'routes': results}
+
+
+# ============ LOAD ============
+# (name, method, path, params, body, role); every scenario runs at the same concurrency
+SCENARIOS = [
+    ('mess_menu', 'GET', '/api/mess/menu', None, None, 'student'),
+    ('mess_ratings', 'GET', '/api/mess/ratings', None, None, 'student'),
+    ('mess_feedback', 'POST', '/api/mess/feedback', None, {'meal_type': 'lunch', 'rating': 4, 'comment': 'bench'}, 'student'),
+    ('mess_analytics', 'GET', '/api/mess/analytics', {'granularity': 'week'}, None, 'admin'),
+    ('equipment', 'GET', '/api/sports/equipment', None, None, 'student'),
+    ('lost_found_page', 'GET', '/api/lost-found/items', {'limit': 50}, None, 'student'),
+    ('lost_found_search', 'GET', '/api/lost-found/items', {'search': 'wallet lib', 'limit': 50}, None, 'student'),
+    ('complaints_page', 'GET', '/api/complaints', {'limit': 50}, None, 'student'),
+    ('complaints_pending', 'GET', '/api/complaints', {'status': 'Pending', 'limit': 50}, None, 'admin'),
+]
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))]
+
+
+async def run_scenario(http, scenario, headers, requests_per_route, concurrency):
+    name, method, path, params, body, role = scenario
+    latencies = []
+    errors = 0
+    payload_bytes = 0
+    remaining = iter(range(requests_per_route))
+
+    async def worker():
+        nonlocal errors, payload_bytes
+        for _ in remaining:
+            start = time.perf_counter()
+            try:
+                response = await http.request(method, path, params=params, json=body, headers=headers[role])
+            except httpx.HTTPError:
+                errors += 1
+                continue
+            latencies.append((time.perf_counter() - start) * 1000)
+            payload_bytes += len(response.content)
+            if response.status_code >= 400:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return name, {
+        'requests': requests_per_route,
+        'errors': errors,
+        'throughput_rps': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(percentile(latencies, 0.50), 2),
+        'p95_ms': round(percentile(latencies, 0.95), 2),
+        'p99_ms': round(percentile(latencies, 0.99), 2),
+        'mean_payload_bytes': round(payload_bytes / len(latencies)) if latencies else 0
+    }
+
+
+async def run_load(http, requests_per_route, concurrency, routes=None):
+    headers = {}
+    for role, email in (('student', STUDENT_EMAIL), ('admin', ADMIN_EMAIL)):
+        response = await http.post('/api/auth/login', json={'email': email})
+        response.raise_for_status()
+        headers[role] = {'Authorization': f"Bearer {response.json()['token']}"}
+    results = {}
+    for scenario in SCENARIOS:
+        if routes and scenario[0] not in routes:
+            continue
+        # One warm-up request so first-hit cache builds are not counted
+        await http.request(scenario[1], scenario[2], params=scenario[3], json=scenario[4], headers=headers[scenario[5]])
+        name, stats = await run_scenario(http, scenario, headers, requests_per_route, concurrency)
+        results[name] = stats
+    return results
+
+
+def use_mongomock():
+    """Point the in-process server at an in-memory mongomock database"""
+    try:
+        from mongomock_motor import AsyncMongoMockClient
+    except ImportError:
+        raise SystemExit('--mongomock needs the mongomock-motor package (pip install mongomock-motor)')
+    server.client = AsyncMongoMockClient(tz_aware=True)
+    server.db = server.client['campus_bench']
+
+
+async def bench_load(args):
+    if args.mongomock:
+        use_mongomock()
+    seeded = None
+    if args.seed:
+        seeded = await seed(args.seed, args.seed, args.seed)
+    limits = httpx.Limits(max_connections=args.concurrency)
+    if args.in_process or args.mongomock:
+        # Run the app in this process; startup hooks are not fired by the ASGI transport
+        await server.app.router.startup()
+        try:
+            transport = httpx.ASGITransport(app=server.app)
+            async with httpx.AsyncClient(transport=transport, base_url='http://bench', limits=limits, timeout=60) as http:
+                routes = await run_load(http, args.requests, args.concurrency, args.routes)
+        finally:
+            await server.app.router.shutdown()
+    else:
+        async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=60) as http:
+            routes = await run_load(http, args.requests, args.concurrency, args.routes)
+    return {
+        'benchmark': 'load',
+        'target': 'in-process' if args.in_process or args.mongomock else args.base_url,
+        'concurrency': args.concurrency,
+        'requests_per_route': args.requests,
+        'seed': seeded,
+        'routes': routes
+    }
+
+
+def compare_to_baseline(result, baseline, threshold, min_delta_ms):
+    """Return a list of routes whose p95 or throughput regressed past threshold (a fraction)"""
+    regressions = []
+    for name, current in result['routes'].items():
+        previous = baseline.get('routes', {}).get(name)
+        if not previous:
+            continue
+        p95_limit = max(previous['p95_ms'] * (1 + threshold), previous['p95_ms'] + min_delta_ms)
+        if current['p95_ms'] > p95_limit:
+            regressions.append({'route': name, 'metric': 'p95_ms', 'baseline': previous['p95_ms'], 'current': current['p95_ms']})
+        if current['throughput_rps'] < previous['throughput_rps'] * (1 - threshold):
+            regressions.append({'route': name, 'metric': 'throughput_rps', 'baseline': previous['throughput_rps'], 'current': current['throughput_rps']})
+        if current['errors'] > previous['errors']:
+            regressions.append({'route': name, 'metric': 'errors', 'baseline': previous['errors'], 'current': current['errors']})
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Campus Catalyst backend benchmarks')
+    benchmarks = parser.add_subparsers(dest='benchmark', required=True)
+
+    auth_parser = benchmarks.add_parser('auth', help='JWT verification overhead per request')
+    auth_parser.add_argument('--iterations', type=int, default=20000)
+
+    seed_parser = benchmarks.add_parser('seed', help='Insert synthetic complaints, lost & found items and feedback into DB_NAME')
+    seed_parser.add_argument('--complaints', type=int, default=10000)
+    seed_parser.add_argument('--items', type=int, default=10000)
+    seed_parser.add_argument('--feedback', type=int, default=10000)
+    seed_parser.add_argument('--random-seed', type=int, default=0)
+
+    serialize_parser = benchmarks.add_parser('serialize', help='Serialization CPU per 1000 rows on each list route')
+    serialize_parser.add_argument('--rows', type=int, default=1000)
+    serialize_parser.add_argument('--iterations', type=int, default=20)
+
+    load_parser = benchmarks.add_parser('load', help='Concurrent traffic per route with latency percentiles')
+    load_parser.add_argument('--base-url', default='http://localhost:8001')
+    load_parser.add_argument('--in-process', action='store_true', help='Serve the app in this process against MONGO_URL')
+    load_parser.add_argument('--mongomock', action='store_true', help='Serve in-process against an in-memory database (implies --in-process)')
+    load_parser.add_argument('--seed', type=int, default=0, help='Rows of each kind to seed before the run')
+    load_parser.add_argument('--requests', type=int, default=500, help='Requests per route')
+    load_parser.add_argument('--concurrency', type=int, default=32)
+    load_parser.add_argument('--routes', nargs='*', choices=[scenario[0] for scenario in SCENARIOS])
+    load_parser.add_argument('--save-baseline', type=Path)
+    load_parser.add_argument('--baseline', type=Path, help='Fail when a route regresses against this result file')
+    load_parser.add_argument('--threshold', type=float, default=0.2, help='Allowed fractional regression (default 0.2)')
+    load_parser.add_argument('--min-delta-ms', type=float, default=2.0, help='Ignore p95 changes smaller than this')
+
+    args = parser.parse_args()
+    exit_code = 0
+    if args.benchmark == 'auth':
+        result = bench_auth(args.iterations)
+    elif args.benchmark == 'seed':
+        try:
+            result = asyncio.run(seed(args.complaints, args.items, args.feedback, args.random_seed))
+        finally:
+            server.client.close()
+    elif args.benchmark == 'serialize':
+        result = asyncio.run(bench_serialize(args.rows, args.iterations))
+    elif args.benchmark == 'load':
+        try:
+            result = asyncio.run(bench_load(args))
+        finally:
+            server.client.close()
+        if args.save_baseline:
+            args.save_baseline.write_text(json.dumps(result, indent=2) + '\n')
+        if args.baseline:
+            regressions = compare_to_baseline(result, json.loads(args.baseline.read_text()), args.threshold, args.min_delta_ms)
+            result['regressions'] = regressions
+            exit_code = 1 if regressions else 0
+
+    print(json.dumps(result, indent=2))
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,10 +1,12 @@
 #!/usr/bin/env python3
 
+import os
 import requests
 import sys
 import json
 from datetime import datetime
 import base64
+from concurrent.futures import ThreadPoolExecutor
 
 class CampusCatalystAPITester:
     def __init__(self, base_url="https://iiit-companion-1.preview.emergentagent.com"):
@@ -197,6 +199,40 @@ class CampusCatalystAPITester:
             self.log_test("Lost & Found Post API", False, str(e))
         return False
 
+    def test_delta_sync(self):
+        """Test that a sync token only returns what changed after it"""
+        if not self.student_token:
+            self.log_test("Delta Sync API", False, "No student token available")
+            return False
+        
+        try:
+            snapshot = requests.get(f"{self.api_url}/sync")
+            if snapshot.status_code != 200:
+                self.log_test("Delta Sync API", False, f"Status {snapshot.status_code}")
+                return False
+            token = snapshot.json()['token']
+            
+            headers = {'Authorization': f'Bearer {self.student_token}'}
+            item_data = {
+                "type": "found",
+                "item_name": "Sync Test Umbrella",
+                "description": "Black umbrella",
+                "location": "Library",
+                "contact_name": "Test Student"
+            }
+            created = requests.post(f"{self.api_url}/lost-found/item", json=item_data, headers=headers).json()
+            
+            delta = requests.get(f"{self.api_url}/sync", params={'since': token}).json()
+            changed_ids = [item['id'] for item in delta['lost_found']['changed']]
+            if created['id'] in changed_ids and not delta['reset']:
+                self.log_test("Delta Sync API", True)
+                return True
+            else:
+                self.log_test("Delta Sync API", False, "New item missing from the delta")
+        except Exception as e:
+            self.log_test("Delta Sync API", False, str(e))
+        return False
+
     def test_complaints_list(self):
         """Test complaints listing"""
         try:
@@ -285,6 +321,41 @@ class CampusCatalystAPITester:
             self.log_test("Admin Equipment Update API", False, str(e))
         return False
 
+    def test_concurrent_booking(self, equipment_list, attempts=200):
+        """Fire simultaneous bookings at one item and expect exactly one winner"""
+        if not self.student_token or not self.admin_token or not equipment_list:
+            self.log_test("Concurrent Booking", False, "No tokens or equipment")
+            return False
+        
+        try:
+            admin_headers = {'Authorization': f'Bearer {self.admin_token}'}
+            student_headers = {'Authorization': f'Bearer {self.student_token}'}
+            equipment_id = equipment_list[-1]['id']
+            status_url = f"{self.api_url}/sports/equipment/{equipment_id}/status"
+            
+            requests.put(status_url, json={"status": "Available"}, headers=admin_headers)
+            
+            def book(_):
+                return requests.post(f"{self.api_url}/sports/book",
+                                     json={"equipment_id": equipment_id}, headers=student_headers).status_code
+            
+            with ThreadPoolExecutor(max_workers=50) as pool:
+                statuses = list(pool.map(book, range(attempts)))
+            
+            requests.put(status_url, json={"status": "Available"}, headers=admin_headers)
+            
+            winners = statuses.count(200)
+            rejected = statuses.count(400)
+            if winners == 1 and rejected == attempts - 1:
+                self.log_test(f"Concurrent Booking ({attempts} requests)", True)
+                return True
+            else:
+                self.log_test(f"Concurrent Booking ({attempts} requests)", False,
+                              f"{winners} successful bookings, {rejected} rejected, others: {sorted(set(statuses) - {200, 400})}")
+        except Exception as e:
+            self.log_test("Concurrent Booking", False, str(e))
+        return False
+
     def run_all_tests(self):
         """Run all API tests"""
         print("🚀 Starting Campus Catalyst API Tests")
@@ -313,6 +384,7 @@ class CampusCatalystAPITester:
         self.test_lost_found_items()
         if student_login:
             self.test_lost_found_post()
+            self.test_delta_sync()
         
         # Test Complaints
         print("\n📝 Testing Complaints...")
@@ -328,6 +400,11 @@ class CampusCatalystAPITester:
         if admin_login and equipment_list:
             self.test_admin_equipment_update(equipment_list)
         
+        # Test Booking Contention
+        print("\n🏸 Testing Booking Contention...")
+        if student_login and admin_login and equipment_list:
+            self.test_concurrent_booking(equipment_list)
+        
         # Print Results
         print("\n" + "=" * 50)
         print(f"📊 Test Results: {self.tests_passed}/{self.tests_run} passed")
@@ -340,7 +417,8 @@ class CampusCatalystAPITester:
         return self.tests_passed == self.tests_run
 
 def main():
-    tester = CampusCatalystAPITester()
+    # Smoke test against a deployed backend; the local suite lives in tests/
+    tester = CampusCatalystAPITester(os.environ.get("BACKEND_URL", "https://iiit-companion-1.preview.emergentagent.com"))
     success = tester.run_all_tests()
     return 0 if success else 1
 
@@ -378,9 +378,9 @@ export default function Complaints({ onLogout }) {
                   
                   <p className="text-gray-700 mb-4">{complaint.description}</p>
                   
-                  {complaint.imageBase64 && (
+                  {(complaint.image_url || complaint.imageBase64) && (
                     <img
-                      src={`data:${complaint.mimeType};base64,${complaint.imageBase64}`}
+                      src={complaint.image_url ? `${BACKEND_URL}${complaint.thumbnail_url || complaint.image_url}` : `data:${complaint.mimeType};base64,${complaint.imageBase64}`}
                       alt={complaint.title}
                       className="w-full max-w-md rounded-lg border border-gray-200"
                     />
@@ -346,9 +346,9 @@ export default function LostFound({ onLogout }) {
                 className="bg-white rounded-xl shadow-lg border border-gray-100 overflow-hidden card-hover fade-in"
                 style={{ animationDelay: `${index * 0.05}s` }}
               >
-                {item.imageBase64 && (
+                {(item.image_url || item.imageBase64) && (
                   <img
-                    src={`data:${item.mimeType};base64,${item.imageBase64}`}
+                    src={item.image_url ? `${BACKEND_URL}${item.thumbnail_url || item.image_url}` : `data:${item.mimeType};base64,${item.imageBase64}`}
                     alt={item.item_name}
                     className="w-full h-48 object-cover"
                   />
@@ -0,0 +1,73 @@
+import asyncio
+import sys
+from pathlib import Path
+
+import httpx
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'backend'))
+import server  # noqa: E402
+
+mongomock_motor = pytest.importorskip('mongomock_motor')
+import mongomock.collection  # noqa: E402
+
+# mongomock re-reads a find_one_and_update result with the original filter
+# unless _id is projected, so an update that changes a filtered field comes
+# back as None. Project _id internally and drop it, as real Mongo would.
+_find_and_modify = mongomock.collection.Collection._find_and_modify
+
+
+def _find_and_modify_by_id(self, query, projection=None, *args, **kwargs):
+    if not projection or projection.get('_id', 1):
+        return _find_and_modify(self, query, projection, *args, **kwargs)
+    doc = _find_and_modify(self, query, {k: v for k, v in projection.items() if k != '_id'} or None, *args, **kwargs)
+    if doc is not None:
+        doc.pop('_id', None)
+    return doc
+
+
+mongomock.collection.Collection._find_and_modify = _find_and_modify_by_id
+
+
+@pytest.fixture
+def interleaved(monkeypatch):
+    """Yield to the event loop before every collection call.
+
+    mongomock-motor runs each call to completion without suspending, so a
+    read and a later write from one request would never let another request
+    in between. Suspending first gives concurrent requests the overlap a real
+    server has.
+    """
+    # The exported class is a masquerading subclass; the methods live on its base
+    collection = mongomock_motor.AsyncMongoMockCollection.__mro__[1]
+    for name, method in list(vars(collection).items()):
+        if not asyncio.iscoroutinefunction(method):
+            continue
+
+        async def suspending(self, *args, _method=method, **kwargs):
+            await asyncio.sleep(0)
+            return await _method(self, *args, **kwargs)
+
+        monkeypatch.setattr(collection, name, suspending)
+
+
+@pytest.fixture
+def anyio_backend():
+    return 'asyncio'
+
+
+@pytest.fixture
+async def http(monkeypatch):
+    """The app served in-process against an in-memory database; startup jobs are not run."""
+    mock = mongomock_motor.AsyncMongoMockClient(tz_aware=True)
+    monkeypatch.setattr(server, 'client', mock)
+    monkeypatch.setattr(server, 'db', mock['campus_test'])
+    server.response_cache.invalidate('equipment')
+    transport = httpx.ASGITransport(app=server.app)
+    async with httpx.AsyncClient(transport=transport, base_url='http://test') as client:
+        yield client
+
+
+async def login(http, email):
+    response = await http.post('/api/auth/login', json={'email': email})
+    return {'Authorization': f"Bearer {response.json()['token']}"}
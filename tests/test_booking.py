@@ -0,0 +1,38 @@
+import asyncio
+import uuid
+from datetime import datetime, timezone
+
+import pytest
+
+from tests.conftest import login, server
+
+pytestmark = pytest.mark.anyio
+
+STUDENTS = 400
+
+
+async def test_concurrent_bookings_have_one_winner(http, interleaved):
+    equipment_id = str(uuid.uuid4())
+    await server.db.sports_equipment.insert_one({
+        'id': equipment_id, 'name': 'Badminton Racket #1', 'status': 'Available',
+        'issued_to': None, 'issued_at': None, 'due_at': None, 'updated_at': datetime.now(timezone.utc)
+    })
+    headers = [await login(http, f'student{index}@iiitd.ac.in') for index in range(STUDENTS)]
+
+    responses = await asyncio.gather(*[
+        http.post('/api/sports/book', json={'equipment_id': equipment_id}, headers=h) for h in headers
+    ])
+
+    winners = [response for response in responses if response.status_code == 200]
+    assert len(winners) == 1
+    assert sorted({response.status_code for response in responses}) == [200, 400]
+    equipment = await server.db.sports_equipment.find_one({'id': equipment_id}, {'_id': 0})
+    assert equipment['status'] == 'Issued'
+    assert equipment['issued_to'] == winners[0].json()['equipment']['issued_to']
+    assert await server.db.sports_equipment.count_documents({'status': 'Issued'}) == 1
+
+
+async def test_booking_unknown_equipment_is_404(http):
+    headers = await login(http, 'student0@iiitd.ac.in')
+    response = await http.post('/api/sports/book', json={'equipment_id': 'missing'}, headers=headers)
+    assert response.status_code == 404
@@ -0,0 +1,32 @@
+import pytest
+
+from tests.conftest import login
+
+pytestmark = pytest.mark.anyio
+
+ADMIN = 'admin@iiitd.ac.in'
+STAFF = 'warden@iiitd.ac.in'
+
+
+async def test_staff_read_their_own_queue_only(http):
+    admin = await login(http, ADMIN)
+    staff = await login(http, STAFF)
+    created = await http.post('/api/complaints', headers=await login(http, 'student0@iiitd.ac.in'), json={
+        'title': 'Broken window', 'description': 'Common room window is cracked',
+        'location': 'Boys Hostel', 'category': 'maintenance'
+    })
+    complaint_id = created.json()['id']
+    assigned = await http.put(f'/api/complaints/{complaint_id}/assignment', headers=admin, json={'assigned_to': STAFF})
+    assert assigned.status_code == 200, assigned.text
+
+    own = await http.get('/api/complaints/queue', headers=staff)
+    assert own.status_code == 200
+    assert [item['id'] for item in own.json()['items']] == [complaint_id]
+    assert (await http.get('/api/complaints/queue', params={'assignee': STAFF.upper()}, headers=staff)).status_code == 200
+
+    assert (await http.get('/api/complaints/queue', params={'assignee': ADMIN}, headers=staff)).status_code == 403
+    assert (await http.get('/api/complaints/queue')).status_code == 401
+
+    theirs = await http.get('/api/complaints/queue', params={'assignee': STAFF}, headers=admin)
+    assert [item['id'] for item in theirs.json()['items']] == [complaint_id]
+    assert (await http.get('/api/complaints/queue', headers=admin)).json()['items'] == []
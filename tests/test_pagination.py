@@ -0,0 +1,47 @@
+import base64
+import json
+
+import pytest
+
+from tests.conftest import login, server
+
+pytestmark = pytest.mark.anyio
+
+
+def cursor_for(values) -> str:
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip('=')
+
+
+@pytest.mark.parametrize('cursor', [
+    'W3siJGRhdGUiOjV9LCJ4Il0',  # [{"$date": 5}, "x"]
+    cursor_for([{'$date': 'not a date'}, 'x']),
+    cursor_for(['2026-01-01', 'x']),  # a date sort value must be a $date
+    cursor_for([{'$date': '2026-01-01T00:00:00+00:00'}, 5]),
+    'not-base64!',
+])
+async def test_malformed_cursor_is_400(http, cursor):
+    response = await http.get('/api/complaints', params={'cursor': cursor})
+    assert response.status_code == 400
+    assert response.json()['detail'] == 'Invalid cursor'
+
+
+async def test_cursor_round_trips(http):
+    headers = await login(http, 'student0@iiitd.ac.in')
+    for index in range(3):
+        response = await http.post('/api/complaints', headers=headers, json={
+            'title': f'Leaking tap {index}', 'description': 'Bathroom tap keeps running',
+            'location': 'Boys Hostel', 'category': 'maintenance'
+        })
+        assert response.status_code == 200, response.text
+    first = (await http.get('/api/complaints', params={'limit': 2})).json()
+    second = (await http.get('/api/complaints', params={'limit': 2, 'cursor': first['next_cursor']})).json()
+    ids = [item['id'] for item in first['items'] + second['items']]
+    assert len(ids) == len(set(ids)) == 3
+    assert second['next_cursor'] is None
+
+
+async def test_out_of_range_sync_token_is_400(http):
+    names = [*server.SYNC_COLLECTIONS, 'tombstones']
+    response = await http.get('/api/sync', params={'since': cursor_for([[10 ** 20, 'x']] * len(names))})
+    assert response.status_code == 400
+    assert response.json()['detail'] == 'Invalid sync token'